@@ -12,6 +12,15 @@ DBNAME = os.environ.get("DB_NAME")
 USERNAME = os.environ.get("DB_USER")
 PASSWORD = os.environ.get("DB_PASSWORD")
 
+
+def default_face_pool_size() -> int:
+    """
+    uvicorn 워커(WEB_CONCURRENCY)들이 CPU 를 나눠 쓰도록 워커당 얼굴 인식 프로세스 수 (최소 1)
+    """
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY", 1)))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
 @dataclass
 class Config:
     """
@@ -19,10 +28,61 @@ class Config:
     """
     BASE_DIR: str = base_dir
     DB_POOL_RECYCLE: int = 900
+    # 커넥션 풀 (동기/비동기 엔진 각각, uvicorn 워커마다 생성)
+    DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: int = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+    # true 면 최근에 반납된 연결부터 사용 (한가할 때 남는 연결이 pool_recycle 로 정리됨)
+    DB_POOL_USE_LIFO: bool = os.environ.get("DB_POOL_USE_LIFO", "true").lower() == "true"
+    # checkout 시 연결 확인: always (매번 ping) / never / idle (DB_POOL_PING_IDLE 초 이상 쉬던 연결만)
+    DB_POOL_PRE_PING: str = os.environ.get("DB_POOL_PRE_PING", "idle")
+    DB_POOL_PING_IDLE: int = int(os.environ.get("DB_POOL_PING_IDLE", 30))
+    # 목록 API total_count: exact (매번 COUNT) / cached (DB_COUNT_CACHE_TTL 초, 등록/수정/삭제 시 무효화) / estimated (MySQL EXPLAIN)
+    # "cached" 처럼 전체를 정하거나 "course=estimated,class-booking=cached" 처럼 API 별로 지정 (members, course, class-booking)
+    DB_COUNT_STRATEGY: str = os.environ.get("DB_COUNT_STRATEGY", "exact")
+    DB_COUNT_CACHE_TTL: int = int(os.environ.get("DB_COUNT_CACHE_TTL", 60))
     DB_ECHO: bool = True
     DEBUG: bool = False
     TEST_MODE: bool = False
     DB_URL: str = os.environ.get("DB_URL", f"mysql+pymysql://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}")
+    # 얼굴 인식 API 사용 여부 (false 면 /face-ai 라우터와 face_recognition/dlib/OpenCV 를 불러오지 않음)
+    FACE_AI_ENABLED: bool = os.environ.get("FACE_AI_ENABLED", "true").lower() == "true"
+    # 얼굴 인식 프로세스 풀 크기 (0 이면 스레드 풀에서 실행)
+    # uvicorn 워커마다 풀을 만들고 풀 프로세스마다 dlib 모델을 로드하므로 전체 프로세스 수는 워커 수 x 이 값
+    # 기본값은 CPU 수를 워커 수(WEB_CONCURRENCY)로 나눈 값 (메모리가 부족하면 줄여서 지정)
+    FACE_POOL_SIZE: int = int(os.environ.get("FACE_POOL_SIZE", default_face_pool_size()))
+    FACE_STORE_PATH: str = os.path.join(base_dir, "known_faces")
+    FACE_LEGACY_PICKLE_PATH: str = os.path.join(base_dir, "known_faces.dat")
+    # true 면 서버 시작 시 풀 워커와 dlib 모델을 미리 로드 (기본은 첫 요청 시)
+    FACE_POOL_PREWARM: bool = os.environ.get("FACE_POOL_PREWARM", "false").lower() == "true"
+    FACE_BATCH_MAX_IMAGES: int = 32
+    # 기본 얼굴 검출 프로파일 (fast / balanced / accurate)
+    FACE_DETECTION_PROFILE: str = os.environ.get("FACE_DETECTION_PROFILE", "balanced")
+    # 근사 최근접 탐색(IVF) 사용 여부와 recall/속도 조절값 (nlist 0 이면 sqrt(N), nprobe 가 클수록 정확)
+    FACE_ANN_ENABLED: bool = os.environ.get("FACE_ANN_ENABLED", "false").lower() == "true"
+    FACE_ANN_NLIST: int = 0
+    FACE_ANN_NPROBE: int = int(os.environ.get("FACE_ANN_NPROBE", 8))
+    FACE_ANN_MIN_SIZE: int = 1024
+    # 갤러리 스캔 방식: full / prototype (사람별 centroid + exemplar), 스캔 행렬 자료형 float32 / float16 / int8
+    # full + float32 가 아니면 줄인 행렬로 스캔한 뒤 사람 후보 FACE_GALLERY_RERANK 명만 원래 인코딩으로 다시 비교 (ANN 미사용)
+    FACE_GALLERY_MODE: str = os.environ.get("FACE_GALLERY_MODE", "full")
+    FACE_GALLERY_DTYPE: str = os.environ.get("FACE_GALLERY_DTYPE", "float32")
+    FACE_GALLERY_EXEMPLARS: int = 2
+    FACE_GALLERY_RERANK: int = 8
+    # 인식 결과 캐시 (바이트 단위 용량, 0 이면 사용 안 함)
+    FACE_CACHE_MAX_BYTES: int = int(os.environ.get("FACE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    FACE_CACHE_TTL: int = 300
+    FACE_CACHE_PERCEPTUAL: bool = os.environ.get("FACE_CACHE_PERCEPTUAL", "false").lower() == "true"
+    # 스트리밍 인식: 건너뛸 프레임 수, 추적 IoU, 추적 종료/재확인 주기(처리한 프레임 수)
+    FACE_STREAM_FRAME_SKIP: int = 2
+    FACE_STREAM_IOU: float = 0.3
+    FACE_STREAM_MAX_MISSED: int = 10
+    FACE_STREAM_REVERIFY: int = 30
+    # 얼굴 체크인 출석 기록: 이 수만큼 모이거나 이 시간(초)이 지나면 한 번에 기록
+    FACE_CHECKIN_FLUSH_SIZE: int = 32
+    FACE_CHECKIN_FLUSH_INTERVAL: float = 2.0
+    # 회원별로 나눠 기록해도 실패한 체크인을 다시 시도할 횟수 (넘으면 로그를 남기고 버림)
+    FACE_CHECKIN_MAX_RETRIES: int = 3
 
 
 @dataclass
@@ -5,4 +5,17 @@ EXCEPT_PATH_REGEX = "^(/docs|/redoc|/api/auth)"
 MAX_API_KEY = 3
 MAX_API_WHITELIST = 10
 CLASS_TYPE = {"1": "오감", "2": "베이지", "3": "브레인", "4": "테크닉"}
-ENROLLMENT_STATUS = {"1": "수강준비", "2": "수강완료", "3": "수강취소"}
\ No newline at end of file
+ENROLLMENT_STATUS = {"1": "수강준비", "2": "수강완료", "3": "수강취소"}
+
+# 얼굴 인식 허용 거리 (face_recognition.compare_faces 기본값과 동일)
+FACE_MATCH_TOLERANCE = 0.6
+FACE_UNKNOWN_NAME = "인식못함"
+
+# 얼굴 검출 프로파일
+# reduce: 디코딩 축소 배율(IMREAD_REDUCED_*), max_width: 검출 작업 최대 너비(0 이면 제한 없음)
+# upsample: face_locations 업샘플 횟수, model: 검출 모델(hog/cnn)
+FACE_DETECTION_PROFILES = {
+    "fast": {"reduce": 4, "max_width": 640, "upsample": 0, "model": "hog"},
+    "balanced": {"reduce": 2, "max_width": 1280, "upsample": 1, "model": "hog"},
+    "accurate": {"reduce": 1, "max_width": 0, "upsample": 1, "model": "cnn"},
+}
@@ -1,13 +1,36 @@
 from fastapi import FastAPI
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import logging
+from contextlib import contextmanager
+
+from app.common.config import Config
+from app.database.pool import (
+    PRE_PING_STRATEGIES,
+    PoolStats,
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+    ping_idle_connections,
+)
+
+# 동기 드라이버 -> 같은 DB 의 비동기 드라이버
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "mysql+pymysql": "mysql+aiomysql"}
+
+
+def to_async_url(database_url: str):
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
 
 class SQLAlchemy:
     def __init__(self, app: FastAPI = None, **kwargs):
         self._engine = None
         self._session = None
+        self._async_engine = None
+        self._async_session = None
+        self._pool_stats = {}
         if app is not None:
             self.init_app(app=app, **kwargs)
 
@@ -16,13 +39,20 @@ class SQLAlchemy:
         pool_recycle = kwargs.setdefault("DB_POOL_RECYCLE", 900)
         is_testing = kwargs.setdefault("TEST_MODE", False)
         echo = kwargs.setdefault("DB_ECHO", True)
-
-        self._engine = create_engine(
-            database_url,
-            echo=echo,
+        pre_ping = kwargs.setdefault("DB_POOL_PRE_PING", Config.DB_POOL_PRE_PING)
+        if pre_ping not in PRE_PING_STRATEGIES:
+            raise Exception(f"DB_POOL_PRE_PING must be one of {PRE_PING_STRATEGIES}")
+        # 동기/비동기 엔진이 각자 이 설정으로 풀을 만듦 (기본값은 Config 한 곳에서 정함)
+        pool_options = dict(
             pool_recycle=pool_recycle,
-            pool_pre_ping=True,
+            pool_pre_ping=pre_ping == "always",
+            pool_size=kwargs.setdefault("DB_POOL_SIZE", Config.DB_POOL_SIZE),
+            max_overflow=kwargs.setdefault("DB_MAX_OVERFLOW", Config.DB_MAX_OVERFLOW),
+            pool_timeout=kwargs.setdefault("DB_POOL_TIMEOUT", Config.DB_POOL_TIMEOUT),
+            pool_use_lifo=kwargs.setdefault("DB_POOL_USE_LIFO", Config.DB_POOL_USE_LIFO),
         )
+
+        self._engine = create_engine(database_url, echo=echo, poolclass=TimedQueuePool, **pool_options)
         if is_testing:
             db_url = self._engine.url
             if db_url.host != "localhost":
@@ -33,15 +63,32 @@ class SQLAlchemy:
 
         self._session = sessionmaker(autocommit=False, autoflush=False, bind=self._engine)
 
+        # async def 라우터용 비동기 엔진 (이벤트 루프를 막지 않고 풀 크기만큼 동시에 쿼리)
+        self._async_engine = create_async_engine(
+            to_async_url(database_url), echo=echo, poolclass=TimedAsyncAdaptedQueuePool, **pool_options
+        )
+
+        # 풀 통계 수집 (/internal/db/pool)
+        for name, engine in (("sync", self._engine), ("async", self._async_engine.sync_engine)):
+            stats = self._pool_stats[name] = PoolStats()
+            stats.attach(engine)
+            if pre_ping == "idle":
+                ping_idle_connections(engine, kwargs.setdefault("DB_POOL_PING_IDLE", Config.DB_POOL_PING_IDLE), stats)
+        # commit 후에도 응답을 만들 때 속성을 읽을 수 있도록 expire 하지 않음 (비동기 세션은 lazy load 불가)
+        self._async_session = async_sessionmaker(
+            bind=self._async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+        )
+
         @app.on_event("startup")
         def startup():
             self._engine.connect()
             logging.info("DB connected.")
 
         @app.on_event("shutdown")
-        def shutdown():
+        async def shutdown():
             self._session.close_all()
             self._engine.dispose()
+            await self._async_engine.dispose()
             logging.info("DB disconnected")
 
     def get_db(self):
@@ -60,14 +107,60 @@ class SQLAlchemy:
             if db_session is not None:
                 db_session.close()
 
+    @contextmanager
+    def session_scope(self, auto_commit: bool = True):
+        """
+        라우터 밖(배치, 스크립트 등)에서 쓰는 세션 - 끝나면 커밋(예외 시 롤백) 후 닫음
+        :param auto_commit: False 면 커밋하지 않고 닫음 (조회 전용, 가져온 객체가 expire 되지 않음)
+        """
+        if not auto_commit:
+            if self._session is None:
+                raise Exception("must be called 'init_app'")
+            with self._session() as db_session:
+                yield db_session
+            return
+        yield from self.get_db()
+
+    async def get_async_db(self):
+        if self._async_session is None:
+            raise Exception("must be called 'init_app'")
+        async with self._async_session() as db_session:
+            try:
+                yield db_session
+                await db_session.commit()  # 명시적으로 커밋
+            except:
+                await db_session.rollback()  # 예외 발생 시 롤백
+                raise
+
     @property
     def session(self):
         return self.get_db
 
+    @property
+    def async_session(self):
+        return self.get_async_db
+
+    @property
+    def async_session_maker(self):
+        return self._async_session
+
+    def pool_stats(self) -> dict:
+        """
+        동기/비동기 엔진 커넥션 풀 현황과 통계
+        """
+        return {
+            "sync": self._pool_stats["sync"].snapshot(self._engine.pool),
+            "async": self._pool_stats["async"].snapshot(self._async_engine.sync_engine.pool),
+        }
+
     @property
     def engine(self):
         return self._engine
 
+    @property
+    def async_engine(self):
+        return self._async_engine
+
 
 db = SQLAlchemy()
 Base = declarative_base()
\ No newline at end of file
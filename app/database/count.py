@@ -0,0 +1,185 @@
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.expression import Executable, ClauseElement
+
+from app.common.config import Config
+
+COUNT_STRATEGIES = ("exact", "cached", "estimated")
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN <select> (바인드 파라미터는 원래 쿼리 그대로)
+    """
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+def parse_strategies(spec: str) -> Tuple[str, Dict[str, str]]:
+    """
+    "cached" 또는 "course=estimated,class-booking=cached" 형식의 설정을 (기본 전략, API 별 전략) 으로 변환
+    """
+    default, strategies = "exact", {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, strategy = item.rpartition("=")
+        if strategy not in COUNT_STRATEGIES:
+            raise Exception(f"count strategy must be one of {COUNT_STRATEGIES}")
+        if name:
+            strategies[name.strip()] = strategy
+        else:
+            default = strategy
+    return default, strategies
+
+
+class CountCache:
+    """
+    목록 API total_count 계산 전략
+    exact: 매번 COUNT(*)
+    cached: 검색 조건별 COUNT(*) 결과를 ttl 초 동안 보관하고, 관련 테이블이 등록/수정/삭제되면 무효화
+    estimated: MySQL 실행 계획(EXPLAIN)의 예상 행 수 (MySQL 이 아니거나 실패하면 exact)
+    캐시는 uvicorn 워커마다 따로 있으므로 다른 워커에서 바뀐 내용은 ttl 이 지나야 반영된다.
+    """
+
+    def __init__(self, app: FastAPI = None, **kwargs):
+        self.ttl = 60
+        self.default = "exact"
+        self.strategies: Dict[str, str] = {}
+        self._entries: Dict[tuple, tuple] = {}
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app=app, **kwargs)
+
+    def init_app(self, app: FastAPI, **kwargs):
+        self.ttl = kwargs.setdefault("DB_COUNT_CACHE_TTL", Config.DB_COUNT_CACHE_TTL)
+        self.default, self.strategies = parse_strategies(kwargs.setdefault("DB_COUNT_STRATEGY", Config.DB_COUNT_STRATEGY))
+
+    def strategy(self, endpoint: str) -> str:
+        return self.strategies.get(endpoint, self.default)
+
+    def invalidate(self, *tables: str):
+        """
+        테이블 변경 시 호출: 이 테이블을 포함한 검색의 캐시된 count 를 무효화
+        """
+        for table in tables:
+            self._versions[table] = self._versions.get(table, 0) + 1
+
+    def _key(self, endpoint: str, tables: Iterable[str], params: dict) -> tuple:
+        return endpoint, tuple(sorted(params.items())), tuple((t, self._versions.get(t, 0)) for t in tables)
+
+    def _lookup(self, key: tuple) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] >= time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self._entries.pop(key, None)
+        self.misses += 1
+        return None
+
+    def _store(self, key: tuple, total: int):
+        # 무효화되어 더 이상 쓰이지 않는 항목 정리
+        now = time.monotonic()
+        if len(self._entries) > 1024:
+            self._entries = {k: v for k, v in self._entries.items() if v[0] >= now}
+        self._entries[key] = (now + self.ttl, total)
+
+    @staticmethod
+    def _statements(query):
+        statement = query.statement if isinstance(query, Query) else query
+        statement = statement.order_by(None).limit(None).offset(None)
+        return statement, select(func.count()).select_from(statement.subquery())
+
+    @staticmethod
+    def _estimate(rows) -> int:
+        # nested loop 조인: 테이블별 예상 행 수 x filtered% 의 곱
+        total = 1.0
+        for row in rows:
+            row = row._mapping
+            total *= (row.get("rows") or 0) * (row.get("filtered") or 100) / 100
+        return int(total)
+
+    def count(self, session: Session, endpoint: str, query, tables: Iterable[str],
+              params: dict = None, with_total: bool = True) -> Tuple[Optional[int], Optional[str]]:
+        """
+        동기 세션용 total_count
+        :param endpoint: 전략 설정과 캐시 키에 쓰는 API 이름 (members, course, class-booking)
+        :param query: 목록 쿼리 (Query 또는 select(), 정렬/페이징은 무시)
+        :param tables: 쿼리가 읽는 테이블 (이 테이블이 무효화되면 캐시도 무효)
+        :param params: 검색 조건 (캐시 키)
+        :param with_total: False 면 count 하지 않음
+        :return: (total_count, 사용한 전략) - with_total 이 False 면 (None, None)
+        """
+        if not with_total:
+            return None, None
+        strategy = self.strategy(endpoint)
+        statement, count_statement = self._statements(query)
+        if strategy == "estimated":
+            if session.bind.dialect.name == "mysql":
+                try:
+                    return self._estimate(session.execute(Explain(statement)).all()), strategy
+                except SQLAlchemyError:
+                    pass
+            strategy = "exact"
+        if strategy == "cached":
+            key = self._key(endpoint, tables, params or {})
+            total = self._lookup(key)
+            if total is None:
+                total = session.scalar(count_statement)
+                self._store(key, total)
+            return total, strategy
+        return session.scalar(count_statement), strategy
+
+    async def acount(self, session: AsyncSession, endpoint: str, query, tables: Iterable[str],
+                     params: dict = None, with_total: bool = True) -> Tuple[Optional[int], Optional[str]]:
+        """
+        count 의 비동기 세션 버전
+        """
+        if not with_total:
+            return None, None
+        strategy = self.strategy(endpoint)
+        statement, count_statement = self._statements(query)
+        if strategy == "estimated":
+            if session.bind.dialect.name == "mysql":
+                try:
+                    return self._estimate((await session.execute(Explain(statement))).all()), strategy
+                except SQLAlchemyError:
+                    pass
+            strategy = "exact"
+        if strategy == "cached":
+            key = self._key(endpoint, tables, params or {})
+            total = self._lookup(key)
+            if total is None:
+                total = await session.scalar(count_statement)
+                self._store(key, total)
+            return total, strategy
+        return await session.scalar(count_statement), strategy
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "default": self.default,
+            "strategies": self.strategies,
+            "ttl": self.ttl,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+count_cache = CountCache()
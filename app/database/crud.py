@@ -0,0 +1,246 @@
+import logging
+from datetime import date, datetime, time
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, contains_eager
+
+from app.database.schema import ClassBooking, Course, Members
+from app.utils.date_utils import day_range
+
+# 수강 횟수를 사용하는 예약 상태 (수강준비, 수강완료) - 취소(3)는 제외
+ACTIVE_ENROLLMENT_STATUSES = ("1", "2")
+
+
+def is_duplicate_day(error: IntegrityError) -> bool:
+    """
+    수강별 하루 한 건 unique 키(uq_class_booking_course_id_active_day) 위반 여부
+    """
+    return "active_day" in str(error.orig)
+
+
+def take_session(course_id: int, count: int = 1):
+    """
+    남은 수강 횟수 count 만큼 차감 (남은 횟수가 충분할 때만 - rowcount 0 이면 차감 실패)
+    """
+    return update(Course).where(
+        Course.id == course_id,
+        Course.deleted_at.is_(None),
+        Course.remaining_sessions >= count,
+    ).values(remaining_sessions=Course.remaining_sessions - count).execution_options(synchronize_session=False)
+
+
+def release_session(course_id: int):
+    """
+    예약 취소/삭제로 수강 횟수 1 반환
+    """
+    return update(Course).where(
+        Course.id == course_id,
+    ).values(remaining_sessions=Course.remaining_sessions + 1).execution_options(synchronize_session=False)
+
+
+def expected_remaining_sessions():
+    """
+    class_booking 으로 다시 계산한 남은 수강 횟수 (course 행마다 상관 서브쿼리)
+    """
+    used = select(func.count(ClassBooking.id)).where(
+        ClassBooking.course_id == Course.id,
+        ClassBooking.enrollment_status.in_(ACTIVE_ENROLLMENT_STATUSES),
+        ClassBooking.deleted_at.is_(None),
+    ).correlate(Course).scalar_subquery()
+    return Course.session_count - used
+
+
+async def reconcile_remaining_sessions(session: AsyncSession, course_ids: list = None) -> int:
+    """
+    course.remaining_sessions 를 class_booking 기준으로 다시 계산 (값이 다른 수강만 갱신)
+    직접 DB 를 수정했거나 갱신 로직 밖에서 예약이 바뀐 경우 바로잡는 용도 (/internal/db/reconcile/remaining-sessions)
+    :param course_ids: 없으면 전체 수강
+    :return: 고친 수강 수
+    """
+    expected = expected_remaining_sessions()
+    stmt = update(Course).where(Course.remaining_sessions != expected)
+    if course_ids:
+        stmt = stmt.where(Course.id.in_(course_ids))
+    result = await session.execute(
+        stmt.values(remaining_sessions=expected).execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    if result.rowcount:
+        logging.warning(f"remaining_sessions reconciled: {result.rowcount} courses")
+    return result.rowcount
+
+
+# 라우터와 /internal/db/explain 이 같이 쓰는 조회 조건
+# EXPLAIN 점검(app.database.explain)이 실제 API 쿼리와 같은 모양을 확인하도록 조건은 여기서만 만든다.
+
+def members_where(id=None, name: str = None, phone: str = None, parent_phone: str = None,
+                  start_date: datetime = None, end_date: datetime = None) -> list:
+    """
+    회원 목록 검색 조건
+    """
+    where = [Members.deleted_at.is_(None)]  # deleted_at이 null인 경우만 필터링
+    if id:
+        where.append(Members.id == id)
+    if name:
+        where.append(Members.name.ilike(f"%{name}%"))
+    if phone:
+        where.append(Members.phone.ilike(f"%{phone}%"))
+    if parent_phone:
+        where.append(Members.parent_phone.ilike(f"%{parent_phone}%"))
+    if start_date:
+        where.append(Members.created_at >= start_date)
+    if end_date:
+        where.append(Members.created_at <= datetime.combine(end_date.date(), time.max))
+    return where
+
+
+def course_period_where(course, start_date: datetime = None, end_date: datetime = None) -> list:
+    """
+    수강 기간 검색 조건 (둘 다 주면 기간이 겹치는 수강)
+    :param course: Course 또는 aliased(Course)
+    """
+    if start_date and end_date:
+        return [or_(
+            and_(course.start_date >= start_date, course.start_date <= end_date),
+            and_(course.end_date >= start_date, course.end_date <= end_date),
+            and_(course.start_date <= start_date, course.end_date >= end_date)
+        )]
+    where = []
+    if start_date:
+        where.append(course.start_date >= start_date)
+    if end_date:
+        where.append(course.end_date <= end_date)
+    return where
+
+
+def course_list_query(id=None, name: str = None, phone: str = None, parent_phone: str = None,
+                      class_type: str = None, start_date: datetime = None, end_date: datetime = None):
+    """
+    수강 목록 조회 (course ⋈ members)
+    :return: select, 정렬/페이징에 쓰는 course alias
+    """
+    course_alias = aliased(Course)
+    members_alias = aliased(Members)
+
+    course_where = course_period_where(course_alias, start_date, end_date)
+    members_where = []
+    if id:
+        course_where.append(course_alias.id == id)
+    if name:
+        members_where.append(members_alias.name.ilike(f"%{name}%"))
+    if phone:
+        members_where.append(members_alias.phone == phone)
+    if parent_phone:
+        members_where.append(members_alias.parent_phone == parent_phone)
+    if class_type:
+        course_where.append(course_alias.class_type == class_type)
+
+    query = select(course_alias).filter(
+        course_alias.deleted_at.is_(None),  # deleted_at이 null인 경우만 필터링
+        *course_where
+    ).join(members_alias).filter(
+        members_alias.deleted_at.is_(None),
+        *members_where
+    ).options(
+        # 회원 정보는 이미 join 한 결과로 채움
+        contains_eager(course_alias.member.of_type(members_alias))
+    )
+    return query, course_alias
+
+
+def course_bookings_where() -> list:
+    """
+    수강 목록에서 함께 불러오는 예약 조건 (selectinload 가 페이지의 수강 id IN (...) 과 함께 사용)
+    """
+    return [ClassBooking.deleted_at.is_(None)]
+
+
+def course_remaining_query(id=None, start_date: datetime = None, end_date: datetime = None):
+    """
+    남은 수강 횟수가 있는 수강 조회 (course.remaining_sessions 인덱스로 범위 검색)
+    """
+    course_alias = aliased(Course)
+    members_alias = aliased(Members)
+
+    course_where = course_period_where(course_alias, start_date, end_date)
+    if id:
+        course_where.append(course_alias.id == id)
+
+    return select(course_alias).filter(
+        course_alias.deleted_at.is_(None),
+        course_alias.remaining_sessions > 0,
+        *course_where
+    ).join(
+        members_alias,
+        course_alias.members_id == members_alias.id
+    ).options(
+        contains_eager(course_alias.member.of_type(members_alias))
+    )
+
+
+def class_booking_where(id=None, start_date: date = None, end_date: date = None, name: str = None,
+                        class_type: str = None, enrollment_status: str = None) -> list:
+    """
+    예약 목록/내보내기 공통 검색 조건 (class_booking ⋈ course ⋈ members)
+    """
+    where = [
+        ClassBooking.deleted_at.is_(None),  # deleted_at이 null인 경우만 필터링
+        Course.deleted_at.is_(None),
+        Members.deleted_at.is_(None),
+    ]
+    if id:
+        where.append(ClassBooking.id == id)
+    # 날짜 조건은 [start_date 00:00, end_date 다음날 00:00) 범위로 비교 (reservation_date 인덱스 사용)
+    if start_date:
+        where.append(ClassBooking.reservation_date >= day_range(start_date)[0])
+    if end_date:
+        where.append(ClassBooking.reservation_date < day_range(end_date)[1])
+    if name:
+        where.append(Members.name.ilike(f"%{name}%"))
+    if class_type:
+        where.append(Course.class_type == class_type)
+    if enrollment_status:
+        where.append(ClassBooking.enrollment_status == enrollment_status)
+    return where
+
+
+def booked_days_query(course_id: int, start_date: date, end_date: date):
+    """
+    기간 안에 이미 있는 예약 일시 (취소 제외, 일정 예약 생성의 중복 확인)
+    """
+    return select(ClassBooking.reservation_date).filter(
+        ClassBooking.course_id == course_id,
+        ClassBooking.reservation_date >= day_range(start_date)[0],
+        ClassBooking.reservation_date < day_range(end_date)[1],
+        ClassBooking.enrollment_status != "3",
+        ClassBooking.deleted_at.is_(None)
+    )
+
+
+def member_courses_query(members_ids: list, day: date):
+    """
+    회원들의 그날 유효한 수강 (종료일이 빠른 순, 얼굴 체크인 출석 기록)
+    """
+    day_start, day_end = day_range(day)
+    return select(Course).filter(
+        Course.members_id.in_(members_ids),
+        Course.deleted_at.is_(None),
+        Course.start_date < day_end,
+        Course.end_date >= day_start,
+    ).order_by(Course.end_date, Course.id)
+
+
+def day_bookings_query(course_ids: list, day: date):
+    """
+    수강들의 그날 예약 (취소 제외, 얼굴 체크인 출석 기록)
+    """
+    day_start, day_end = day_range(day)
+    return select(ClassBooking).filter(
+        ClassBooking.course_id.in_(course_ids),
+        ClassBooking.reservation_date >= day_start,
+        ClassBooking.reservation_date < day_end,
+        ClassBooking.enrollment_status != "3",
+        ClassBooking.deleted_at.is_(None),
+    )
@@ -0,0 +1,62 @@
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.count import Explain
+from app.database.crud import (
+    booked_days_query,
+    class_booking_where,
+    course_bookings_where,
+    course_list_query,
+    course_remaining_query,
+    day_bookings_query,
+    member_courses_query,
+    members_where,
+)
+from app.database.schema import ClassBooking, Course, Members
+
+
+def hot_queries() -> dict:
+    """
+    라우터/체크인에서 자주 실행되는 조회 (app.database.crud 의 같은 조건 함수로 만듦, 값은 아무거나 - 실행 계획만 확인)
+    """
+    today = date.today()
+    class_bookings = select(ClassBooking.id).join(Course).join(Members)
+    course_list, course_alias = course_list_query()
+    return {
+        "class_booking_list_range": class_bookings.filter(*class_booking_where(start_date=today, end_date=today)),
+        "class_booking_list_cursor": ClassBooking.keyset(
+            class_bookings.filter(*class_booking_where()), "", 10,
+            ClassBooking.reservation_date, ClassBooking.id,
+        ),
+        "class_booking_booked_days": booked_days_query(0, today, today),
+        "course_list_cursor": Course.keyset(course_list, "", 10, course_alias.id),
+        # 수강 목록의 selectinload 와 같은 조건 (페이지의 수강 id IN (...))
+        "course_bookings": select(ClassBooking.id).filter(
+            ClassBooking.course_id.in_([0]),
+            *course_bookings_where(),
+        ),
+        "course_remaining": course_remaining_query(),
+        "member_courses": member_courses_query([0], today),
+        "member_day_bookings": day_bookings_query([0], today),
+        "members_list": Members.keyset(select(Members.id).filter(*members_where()), "", 10),
+    }
+
+
+async def explain_hot_queries(session: AsyncSession) -> dict:
+    """
+    hot_queries 의 MySQL 실행 계획을 확인해 전체 스캔(type=ALL)하는 테이블을 찾음
+    테이블이 아주 작으면 옵티마이저가 인덱스 대신 전체 스캔을 고르기도 하므로 운영 규모의 데이터에서 확인한다.
+    :return: {"ok": 전체 스캔 없음, "queries": {이름: {"full_scan": [테이블], "plan": [EXPLAIN 행]}}}
+    """
+    if session.bind.dialect.name != "mysql":
+        raise Exception("EXPLAIN check is only supported on MySQL")
+    queries = {}
+    for name, statement in hot_queries().items():
+        plan = [dict(row._mapping) for row in (await session.execute(Explain(statement))).all()]
+        queries[name] = {
+            "full_scan": [row["table"] for row in plan if row.get("type") == "ALL"],
+            "plan": plan,
+        }
+    return {"ok": not any(query["full_scan"] for query in queries.values()), "queries": queries}
@@ -0,0 +1,145 @@
+import time
+from collections import deque
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+PRE_PING_STRATEGIES = ("always", "never", "idle")
+
+
+class PoolStats:
+    """
+    커넥션 풀 통계 (풀 크기 산정용)
+    checkout 대기 시간, 새 연결/종료/무효화 횟수(connection churn), idle ping 결과를 모은다.
+    """
+
+    def __init__(self, sample_size: int = 1000):
+        """
+        :param sample_size: 분위수 계산에 쓰는 최근 checkout 대기 시간 표본 수
+        """
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits = deque(maxlen=sample_size)
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self._waits.append(seconds)
+
+    def attach(self, engine):
+        """
+        엔진(비동기 엔진은 sync_engine)의 풀 이벤트에 통계 수집 등록
+        """
+        engine.pool._stats = self
+
+        @event.listens_for(engine, "connect")
+        def connect(dbapi_connection, connection_record):
+            self.connects += 1
+
+        @event.listens_for(engine, "close")
+        def close(dbapi_connection, connection_record):
+            self.closes += 1
+
+        @event.listens_for(engine, "invalidate")
+        def invalidate(dbapi_connection, connection_record, exception):
+            self.invalidations += 1
+
+    def snapshot(self, pool) -> dict:
+        waits = sorted(self._waits)
+        p50, p95, p99 = (waits[min(len(waits) - 1, int(len(waits) * q))] * 1000 if waits else 0.0
+                         for q in (0.5, 0.95, 0.99))
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms": {
+                "mean": self.wait_total * 1000 / self.checkouts if self.checkouts else 0.0,
+                "max": self.wait_max * 1000,
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+            },
+            "connects": self.connects,
+            "closes": self.closes,
+            "invalidations": self.invalidations,
+            "pings": self.pings,
+            "ping_failures": self.ping_failures,
+        }
+
+
+class TimedPoolMixin:
+    """
+    checkout 대기 시간을 PoolStats 에 기록하는 QueuePool 확장
+    대기 시간은 반납된 연결을 기다린 시간 + overflow 로 새 연결을 만든 시간이다.
+    """
+    _stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self._stats is not None:
+                self._stats.timeouts += 1
+            raise
+        finally:
+            if self._stats is not None:
+                self._stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() 등으로 풀이 다시 만들어져도 통계는 이어서 사용
+        pool = super().recreate()
+        pool._stats = self._stats
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def ping_idle_connections(engine, idle_seconds: float, stats: PoolStats = None):
+    """
+    pre-ping 'idle' 전략: idle_seconds 이상 쉬고 있던 연결만 checkout 시 SELECT 1 로 확인
+    (pool_pre_ping 은 checkout 마다 왕복이 한 번 더 생김)
+    끊어진 연결이면 DisconnectionError 로 풀이 새 연결을 받아오게 한다.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        if stats is not None:
+            stats.pings += 1
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception:
+            if stats is not None:
+                stats.ping_failures += 1
+            connection_record.info.pop("checked_in_at", None)
+            raise exc.DisconnectionError()
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
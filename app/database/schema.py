@@ -1,6 +1,8 @@
+from typing import List
 
 from sqlalchemy import (
     Column,
+    Computed,
     Integer,
     String,
     DateTime,
@@ -9,10 +11,17 @@ from sqlalchemy import (
     Enum,
     Boolean,
     ForeignKey,
+    Index,
+    UniqueConstraint,
+    insert,
+    select,
+    update,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, relationship
 
 from app.database.conn import Base, db
+from app.utils.query_utils import decode_cursor, encode_cursor, keyset_after
 
 
 class BaseMixin:
@@ -55,23 +64,119 @@ class BaseMixin:
     @classmethod
     def get(cls, session: Session = None, **kwargs):
         """
-        Simply get a Row
-        :param session:
+        Simply get a Row (두 건까지만 가져와서 여러 건인지 확인 - 조회 1번)
+        :param session: 없으면 조회용 세션을 열고 닫음
         :param kwargs:
         :return:
         """
-        sess = next(db.session()) if not session else session
-        query = sess.query(cls)
-        for key, val in kwargs.items():
-            col = getattr(cls, key)
-            query = query.filter(col == val)
+        if not session:
+            with db.session_scope(auto_commit=False) as sess:
+                return cls.get(sess, **kwargs)
+        rows = session.execute(select(cls).filter_by(**kwargs).limit(2)).scalars().all()
+        if len(rows) > 1:
+            raise Exception("Only one row is supposed to be returned, but got more than one.")
+        return rows[0] if rows else None
+
+    @classmethod
+    def _bulk_rows(cls, rows: List[dict], keys: set = frozenset()) -> List[dict]:
+        columns = {col.name for col in cls.__table__.columns if not col.primary_key and col.name != "created_at"}
+        columns |= keys
+        return [{key: val for key, val in row.items() if key in columns} for row in rows]
+
+    @classmethod
+    def bulk_create(cls, session: Session, rows: List[dict], auto_commit=False) -> int:
+        """
+        여러 건 적재 (create 를 건마다 부르지 않고 insert 한 번을 executemany 로 실행)
+        MySQL 에서는 여러 행을 묶은 INSERT ... VALUES (...), (...) 로 나가며, 객체를 만들지 않으므로 id 는 돌려주지 않는다.
+        :param session:
+        :param rows: 적재 할 데이터 목록 (컬럼이 아닌 키는 무시)
+        :param auto_commit: 자동 커밋 여부
+        :return: 적재 건수
+        """
+        rows = cls._bulk_rows(rows)
+        if rows:
+            session.execute(insert(cls), rows)
+        if auto_commit:
+            session.commit()
+        return len(rows)
+
+    @classmethod
+    def bulk_update(cls, session: Session, rows: List[dict], auto_commit=False) -> int:
+        """
+        id 로 여러 건 수정 (UPDATE ... WHERE id = ? 를 executemany 로 실행)
+        :param session:
+        :param rows: 수정 할 데이터 목록, 각 행에 id 필수
+        :param auto_commit: 자동 커밋 여부
+        :return: 수정 요청 건수
+        """
+        if any("id" not in row for row in rows):
+            raise Exception("bulk_update rows must have 'id'")
+        rows = cls._bulk_rows(rows, {"id"})
+        if rows:
+            session.execute(update(cls), rows)
+        if auto_commit:
+            session.commit()
+        return len(rows)
 
-        if query.count() > 1:
+    @classmethod
+    async def acreate(cls, session: AsyncSession, auto_commit=False, **kwargs):
+        """
+        create 의 비동기 세션 버전
+        :param session: db.async_session 으로 받은 세션
+        :param auto_commit: 자동 커밋 여부
+        :param kwargs: 적재 할 데이터
+        :return:
+        """
+        obj = cls()
+        for col in obj.all_columns():
+            col_name = col.name
+            if col_name in kwargs:
+                setattr(obj, col_name, kwargs.get(col_name))
+        session.add(obj)
+        await session.flush()
+        if auto_commit:
+            await session.commit()
+        return obj
+
+    @classmethod
+    async def aget(cls, session: AsyncSession, **kwargs):
+        """
+        get 의 비동기 세션 버전 (두 건까지만 가져와서 여러 건인지 확인)
+        :param session: db.async_session 으로 받은 세션
+        :param kwargs:
+        :return:
+        """
+        result = await session.execute(select(cls).filter_by(**kwargs).limit(2))
+        rows = result.scalars().all()
+        if len(rows) > 1:
             raise Exception("Only one row is supposed to be returned, but got more than one.")
-        result = query.first()
-        if not session:
-            sess.close()
-        return result
+        return rows[0] if rows else None
+
+    @classmethod
+    async def abulk_create(cls, session: AsyncSession, rows: List[dict], auto_commit=False) -> int:
+        """
+        bulk_create 의 비동기 세션 버전
+        """
+        rows = cls._bulk_rows(rows)
+        if rows:
+            await session.execute(insert(cls), rows)
+        if auto_commit:
+            await session.commit()
+        return len(rows)
+
+    @classmethod
+    async def abulk_update(cls, session: AsyncSession, rows: List[dict], auto_commit=False) -> int:
+        """
+        bulk_update 의 비동기 세션 버전
+        """
+        if any("id" not in row for row in rows):
+            raise Exception("bulk_update rows must have 'id'")
+        rows = cls._bulk_rows(rows, {"id"})
+        if rows:
+            await session.execute(update(cls), rows)
+        if auto_commit:
+            await session.commit()
+        return len(rows)
 
     @classmethod
     def filter(cls, session: Session = None, **kwargs):
@@ -105,6 +210,35 @@ class BaseMixin:
         obj._q = query
         return obj
 
+    @classmethod
+    def keyset(cls, query, cursor: str, per_page: int, *columns):
+        """
+        keyset(cursor) 페이징 - OFFSET 없이 이전 페이지 마지막 행 다음부터 per_page + 1 건 (다음 페이지 확인용)
+        앞 페이지를 읽고 버리지 않으므로 몇 번째 페이지든 첫 페이지와 비용이 같다.
+        :param query: Query 또는 select()
+        :param cursor: 이전 응답의 next_cursor (빈 값이면 첫 페이지)
+        :param per_page: 페이지당 항목 수
+        :param columns: 정렬 컬럼, 모두 내림차순 (기본 id, 마지막 컬럼은 유일해야 함)
+        :raise InvalidCursor:
+        :return:
+        """
+        columns = columns or (cls.id,)
+        if cursor:
+            query = query.filter(keyset_after(columns, decode_cursor(cursor, columns)))
+        return query.order_by(*(col.desc() for col in columns)).limit(per_page + 1)
+
+    @classmethod
+    def keyset_page(cls, rows: list, per_page: int, *columns):
+        """
+        keyset 으로 가져온 행을 이번 페이지와 next_cursor 로 나눔
+        :return: (rows, next_cursor) - 다음 페이지가 없으면 next_cursor 는 None
+        """
+        columns = columns or (cls.id,)
+        if len(rows) <= per_page:
+            return rows, None
+        rows = rows[:per_page]
+        return rows, encode_cursor([getattr(rows[-1], col.key) for col in columns])
+
     @classmethod
     def cls_attr(cls, col_name=None):
         if col_name:
@@ -183,6 +317,11 @@ class Members(Base, BaseMixin):
     birth_day = Column(Date, nullable=False)
     courses = relationship("Course", back_populates="member")  # Course 클래스와의 관계 설정
 
+    __table_args__ = (
+        # 목록 조회 (deleted_at IS NULL, id 순 - InnoDB 보조 인덱스에 id 포함)
+        Index("ix_members_deleted_at", "deleted_at"),
+    )
+
 class Course(Base, BaseMixin):
     __tablename__ = "course"
     id = Column(Integer, primary_key=True, index=True)
@@ -193,13 +332,35 @@ class Course(Base, BaseMixin):
     session_count = Column(Integer, nullable=False)
     payment_amount = Column(Integer, nullable=False)
     payment_date = Column(DateTime, nullable=False)
+    # 남은 수강 횟수 (session_count - 수강준비/수강완료 예약 수), 예약 등록/수정/삭제와 같은 트랜잭션에서 갱신
+    # 어긋나면 app.database.crud.reconcile_remaining_sessions 로 다시 계산
+    remaining_sessions = Column(Integer, nullable=False, default=0)
     member = relationship("Members", back_populates="courses")  # Members 클래스와의 관계 설정
     class_bookings = relationship("ClassBooking", back_populates="course")  # ClassBooking
 
+    __table_args__ = (
+        Index("ix_course_deleted_at_remaining_sessions", "deleted_at", "remaining_sessions"),
+        # 회원별 수강 (회원 목록의 수강 정보, 얼굴 체크인의 오늘 유효한 수강)
+        Index("ix_course_members_id_deleted_at_end_date", "members_id", "deleted_at", "end_date"),
+    )
+
 class ClassBooking(Base, BaseMixin):
     __tablename__ = "class_booking"
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey('course.id'))  # 외부 키로 설정
     reservation_date = Column(DateTime, nullable=False)
     enrollment_status = Column(Enum("1", "2", "3"), nullable=False)
-    course = relationship("Course", back_populates="class_bookings")  # Course 클래스와의 관계 설정
\ No newline at end of file
+    # 유효한 예약(삭제/취소 제외)의 예약일, 나머지는 NULL - 수강별 하루 한 건 unique 키용 (DB 가 계산)
+    active_day = Column(Date, Computed(
+        "CASE WHEN deleted_at IS NULL AND enrollment_status <> '3' THEN DATE(reservation_date) END", persisted=True
+    ))
+    course = relationship("Course", back_populates="class_bookings")  # Course 클래스와의 관계 설정
+
+    __table_args__ = (
+        # 같은 수강은 하루에 유효한 예약 한 건만 (NULL 은 중복 허용이라 취소/삭제된 예약은 제외)
+        UniqueConstraint("course_id", "active_day", name="uq_class_booking_course_id_active_day"),
+        # 수강별 예약 (중복 예약 확인, 수강 목록의 예약 정보, 체크인의 오늘 예약)
+        Index("ix_class_booking_course_id_deleted_at_reservation_date", "course_id", "deleted_at", "reservation_date"),
+        # 예약 목록 (예약일 범위, 예약일/id cursor 정렬)
+        Index("ix_class_booking_deleted_at_reservation_date", "deleted_at", "reservation_date"),
+    )
\ No newline at end of file
@@ -0,0 +1,117 @@
+from typing import List
+
+import numpy as np
+
+from app.face.gallery import ENCODING_DIM
+
+
+def nearest_centroids(data: np.ndarray, centroids: np.ndarray, count: int = 1, chunk_size: int = 8192) -> np.ndarray:
+    """
+    각 행에서 가장 가까운 centroid 번호 (거리 오름차순 count 개)
+    |x|^2 는 비교에 영향이 없으므로 |c|^2 - 2 x.c 만 계산한다.
+    """
+    c_sq = np.einsum("ij,ij->i", centroids, centroids)
+    result = np.empty((data.shape[0], count), dtype=np.int64)
+    for start in range(0, data.shape[0], chunk_size):
+        block = np.asarray(data[start:start + chunk_size], dtype=np.float32)
+        d2 = c_sq[None, :] - 2.0 * (block @ centroids.T)
+        if count == 1:
+            result[start:start + chunk_size, 0] = np.argmin(d2, axis=1)
+        else:
+            part = np.argpartition(d2, count - 1, axis=1)[:, :count]
+            order = np.argsort(np.take_along_axis(d2, part, axis=1), axis=1)
+            result[start:start + chunk_size] = np.take_along_axis(part, order, axis=1)
+    return result
+
+
+class IVFIndex:
+    """
+    IVF(inverted file) 근사 최근접 탐색 인덱스
+    k-means 로 나눈 nlist 개 클러스터 중 질의와 가까운 nprobe 개 클러스터의 인코딩만 후보로 돌려준다.
+    후보의 실제 거리는 갤러리에서 정확하게 다시 계산한다.
+    """
+
+    def __init__(self, nlist: int = 0, nprobe: int = 8, min_train_size: int = 1024,
+                 dim: int = ENCODING_DIM, iterations: int = 15, seed: int = 0):
+        """
+        :param nlist: 클러스터 수 (0 이면 sqrt(N))
+        :param nprobe: 질의마다 살펴볼 클러스터 수 (클수록 recall 증가, 속도 감소)
+        :param min_train_size: 이 크기 미만이면 학습하지 않음 (갤러리는 정확 검색 사용)
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.dim = dim
+        self.iterations = iterations
+        self._rng = np.random.default_rng(seed)
+        self._centroids = None
+        self._lists: List[np.ndarray] = []
+        self._trained_size = 0
+        self._size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def __len__(self):
+        return self._size
+
+    def train(self, data: np.ndarray):
+        """
+        k-means 로 centroid 를 학습하고 전체 데이터를 클러스터에 배정
+        """
+        n = data.shape[0]
+        nlist = max(1, min(self.nlist or int(np.sqrt(n)), n))
+
+        # 학습은 클러스터당 최대 256 개 표본으로
+        sample_size = min(n, nlist * 256)
+        sample_idx = self._rng.choice(n, sample_size, replace=False) if sample_size < n else np.arange(n)
+        sample = np.asarray(data[np.sort(sample_idx)], dtype=np.float32)
+
+        centroids = sample[self._rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = nearest_centroids(sample, centroids)[:, 0]
+            counts = np.bincount(assign, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = counts == 0
+            centroids[~empty] = sums[~empty] / counts[~empty, None]
+            # 빈 클러스터는 임의의 표본으로 다시 시작
+            if empty.any():
+                centroids[empty] = sample[self._rng.choice(sample_size, int(empty.sum()), replace=False)]
+
+        self._centroids = centroids
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self._size = 0
+        self._trained_size = n
+        self.add(data, 0)
+
+    def add(self, rows: np.ndarray, start: int):
+        """
+        학습된 centroid 에 새 인코딩 배정 (증분 추가)
+        :param rows: 추가된 인코딩
+        :param start: rows[0] 의 갤러리 인덱스
+        """
+        if not self.trained or len(rows) == 0:
+            return
+        assign = nearest_centroids(rows, self._centroids)[:, 0]
+        ids = np.arange(start, start + len(rows), dtype=np.int64)
+        for list_no in np.unique(assign):
+            self._lists[list_no] = np.concatenate([self._lists[list_no], ids[assign == list_no]])
+        self._size += len(rows)
+
+    def needs_training(self, size: int) -> bool:
+        """
+        학습 전이면 min_train_size 도달 시, 학습 후에는 학습 당시보다 2배 커지면 다시 학습
+        """
+        if not self.trained:
+            return size >= self.min_train_size
+        return size >= self._trained_size * 2
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """
+        질의와 가까운 nprobe 개 클러스터에 속한 갤러리 인덱스
+        """
+        nprobe = min(self.nprobe, len(self._lists))
+        probes = nearest_centroids(np.asarray(query, dtype=np.float32).reshape(1, -1), self._centroids, nprobe)[0]
+        return np.concatenate([self._lists[list_no] for list_no in probes])
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, date
+from typing import Dict, Tuple
+
+from fastapi import FastAPI
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.conn import db
+from app.database.count import count_cache
+from app.database.crud import day_bookings_query, member_courses_query
+from app.database.schema import ClassBooking, Course
+
+
+async def write_attendance(session: AsyncSession, checkins: Dict[int, datetime], day: date) -> Dict[int, str]:
+    """
+    같은 날 체크인한 회원들의 출석을 한 번에 기록
+    회원별로 오늘 유효한 수강(Course) 중 남은 횟수가 있고 종료일이 가장 빠른 것을 골라
+    오늘 수강준비(1) 예약이 있으면 수강완료(2)로 바꾸고, 없으면 수강완료(2) 예약을 새로 넣는다.
+    회원 수와 상관없이 조회 2번 + update 2번 + insert 1번으로 처리한다.
+    :param checkins: {members_id: 체크인 시각}
+    :return: {members_id: 결과} (checked_in / already_checked_in / no_course)
+    """
+    # 남은 수강 횟수를 읽고 차감할 때까지 예약 등록과 겹치지 않도록 course 행 잠금
+    courses = (await session.scalars(member_courses_query(list(checkins), day).with_for_update())).all()
+    course_ids = [course.id for course in courses]
+
+    # 오늘 예약 (취소 제외)
+    today = defaultdict(list)
+    if course_ids:
+        for booking in await session.scalars(day_bookings_query(course_ids, day)):
+            today[booking.course_id].append(booking)
+
+    member_courses = defaultdict(list)
+    for course in courses:
+        member_courses[course.members_id].append(course)
+
+    results = {}
+    complete_ids = []
+    new_bookings = []
+    for members_id, checked_at in checkins.items():
+        results[members_id] = "no_course"
+        for course in member_courses[members_id]:
+            bookings = today[course.id]
+            if any(booking.enrollment_status == "2" for booking in bookings):
+                results[members_id] = "already_checked_in"
+                break
+            if bookings:
+                complete_ids.extend(booking.id for booking in bookings)
+                results[members_id] = "checked_in"
+                break
+            if course.remaining_sessions > 0:
+                new_bookings.append({
+                    "course_id": course.id,
+                    "reservation_date": checked_at.replace(second=0, microsecond=0),
+                    "enrollment_status": "2",
+                })
+                results[members_id] = "checked_in"
+                break
+
+    if complete_ids:
+        await session.execute(
+            update(ClassBooking).where(ClassBooking.id.in_(complete_ids)).values(enrollment_status="2"),
+            execution_options={"synchronize_session": False},
+        )
+    if new_bookings:
+        # 새 예약만큼 남은 수강 횟수 차감 (회원마다 수강 하나씩이라 수강별 1)
+        await session.execute(
+            update(Course).where(
+                Course.id.in_([booking["course_id"] for booking in new_bookings]),
+            ).values(remaining_sessions=Course.remaining_sessions - 1),
+            execution_options={"synchronize_session": False},
+        )
+        await ClassBooking.abulk_create(session, new_bookings)
+    await session.commit()
+    if complete_ids or new_bookings:
+        count_cache.invalidate("class_booking")
+    return results
+
+
+class AttendanceBuffer:
+    """
+    얼굴 체크인 출석 write-behind 버퍼
+    체크인 요청은 버퍼에 넣기만 하고 바로 응답하며, flush_size 만큼 모이거나 flush_interval 초가 지나면
+    모인 체크인을 write_attendance 로 한 번에 기록한다.
+    같은 회원의 같은 날 체크인은 한 번만 기록한다.
+    한 번에 기록하지 못하면 회원별로 나눠 기록하고, 그래도 실패한 회원은 max_retries 번까지 다음 flush 때 다시 시도한 뒤 버린다.
+    """
+
+    def __init__(self, app: FastAPI = None, **kwargs):
+        self.flush_size = 32
+        self.flush_interval = 2.0
+        self.max_retries = 3
+        self._pending: Dict[Tuple[int, date], datetime] = {}
+        self._failures: Dict[Tuple[int, date], int] = {}
+        self._seen = set()
+        self._lock = asyncio.Lock()
+        self._task = None
+        self.results = Counter()
+        if app is not None:
+            self.init_app(app=app, **kwargs)
+
+    def init_app(self, app: FastAPI, **kwargs):
+        self.flush_size = kwargs.setdefault("FACE_CHECKIN_FLUSH_SIZE", 32)
+        self.flush_interval = kwargs.setdefault("FACE_CHECKIN_FLUSH_INTERVAL", 2.0)
+        self.max_retries = kwargs.setdefault("FACE_CHECKIN_MAX_RETRIES", 3)
+
+        @app.on_event("startup")
+        async def startup():
+            self._task = asyncio.create_task(self._flush_loop())
+
+        @app.on_event("shutdown")
+        async def shutdown():
+            if self._task is not None:
+                self._task.cancel()
+            await self.flush()
+
+    def add(self, members_id: int, checked_at: datetime = None) -> bool:
+        """
+        체크인 추가
+        :return: 새로 추가되었는지 여부 (오늘 이미 체크인한 회원이면 False)
+        """
+        checked_at = checked_at or datetime.now()
+        key = (members_id, checked_at.date())
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._pending[key] = checked_at
+        if len(self._pending) >= self.flush_size:
+            asyncio.ensure_future(self.flush())
+        return True
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """
+        모인 체크인을 날짜별로 나눠 한 번에 기록 (실패하면 회원별로 나눠 기록)
+        """
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            by_day = defaultdict(dict)
+            for (members_id, day), checked_at in pending.items():
+                by_day[day][members_id] = checked_at
+            for day, checkins in by_day.items():
+                if len(checkins) > 1:
+                    try:
+                        await self._write(checkins, day)
+                        continue
+                    except Exception:
+                        logging.exception("attendance flush failed (%d check-ins), writing one by one", len(checkins))
+                for members_id, checked_at in checkins.items():
+                    await self._write_one(members_id, checked_at, day)
+
+            # 지난 날짜의 중복 확인 기록은 정리
+            today = datetime.now().date()
+            self._seen = {key for key in self._seen if key[1] >= today or key in self._pending}
+
+    async def _write(self, checkins: Dict[int, datetime], day: date):
+        async with db.async_session_maker() as session:
+            results = await write_attendance(session, checkins, day)
+        self.results.update(results.values())
+        for members_id, result in results.items():
+            self._failures.pop((members_id, day), None)
+            # 수강 정보가 없던 회원은 같은 날 수강이 등록/연장된 뒤 다시 체크인할 수 있도록 중복 확인 기록에서 뺌
+            if result == "no_course":
+                self._seen.discard((members_id, day))
+
+    async def _write_one(self, members_id: int, checked_at: datetime, day: date):
+        """
+        회원 한 명만 기록 (실패하면 max_retries 번까지 다음 flush 때 다시 시도, 넘으면 버림)
+        """
+        key = (members_id, day)
+        try:
+            await self._write({members_id: checked_at}, day)
+        except Exception:
+            failures = self._failures[key] = self._failures.get(key, 0) + 1
+            if failures < self.max_retries:
+                logging.exception("attendance write failed (members_id=%d, %s), retry %d/%d",
+                                  members_id, day, failures, self.max_retries)
+                self._pending.setdefault(key, checked_at)
+                return
+            # 버린 체크인은 다시 체크인하면 새로 기록되도록 중복 확인 기록에서도 뺌
+            logging.exception("attendance write dropped (members_id=%d, %s, checked_at=%s) after %d attempts",
+                              members_id, day, checked_at, failures)
+            del self._failures[key]
+            self._seen.discard(key)
+            self.results["failed"] += 1
+
+
+attendance_buffer = AttendanceBuffer()
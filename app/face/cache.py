@@ -0,0 +1,125 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Sequence
+
+
+class RecognitionCache:
+    """
+    얼굴 인식 결과 캐시 (LRU + TTL, 용량은 항목 수가 아니라 바이트 기준)
+    같은 이미지(또는 perceptual hash 가 같은 이미지)의 검출/인코딩 결과와 매칭 결과를 보관한다.
+    매칭 결과는 generation 이 같을 때만 유효하고, 갤러리가 바뀌면 invalidate_matches() 로 무효화한다.
+    """
+
+    def __init__(self, max_bytes: int = 0, ttl: float = 300):
+        """
+        :param max_bytes: 최대 용량 (0 이면 캐시 사용 안 함)
+        :param ttl: 항목 유효 시간(초)
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()
+        # 다른 키 -> 같은 항목의 대표 키 (용량은 대표 키 항목에서 한 번만 계산)
+        self._aliases = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(image_bytes: bytes, profile: str) -> str:
+        """
+        이미지 내용 기준 키 (같은 바이트면 디코딩 결과도 같음)
+        """
+        return f"{profile}:{hashlib.blake2b(image_bytes, digest_size=16).hexdigest()}"
+
+    @staticmethod
+    def perceptual_key(phash: str, profile: str) -> str:
+        """
+        perceptual hash 기준 키 (worker.perceptual_hash 는 이미지 크기를 포함하므로 크기가 같은 이미지끼리만 같은 키)
+        """
+        return f"{profile}:p:{phash}"
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+        key = self._aliases.get(key, key)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, size, value, _ = entry
+        if expires_at < time.monotonic():
+            self._pop(key)
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value, size: int, aliases: Sequence[str] = ()):
+        """
+        :param size: 항목 크기 추정치(바이트)
+        :param aliases: 같은 항목을 가리키는 다른 키 (perceptual key 등, 용량은 한 번만 계산)
+        """
+        if not self.enabled or size > self.max_bytes:
+            return
+        for old_key in (key, *aliases):
+            self._discard(old_key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value, tuple(aliases))
+        for alias in aliases:
+            self._aliases[alias] = key
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            old_key = next(iter(self._entries))
+            self._pop(old_key)
+            self.evictions += 1
+
+    def _discard(self, key: str):
+        """
+        다시 저장하기 전에 기존 항목(대표 키) 또는 다른 항목의 alias 연결을 제거
+        """
+        if key in self._entries:
+            self._pop(key)
+        else:
+            self._aliases.pop(key, None)
+
+    def _pop(self, key: str):
+        _, size, _, aliases = self._entries.pop(key)
+        self._bytes -= size
+        for alias in aliases:
+            if self._aliases.get(alias) == key:
+                del self._aliases[alias]
+
+    def invalidate_matches(self):
+        """
+        갤러리 변경 시 호출: 저장된 매칭 결과를 모두 무효화 (검출/인코딩 결과는 갤러리와 무관하므로 유지)
+        """
+        self.generation += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._aliases.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "aliases": len(self._aliases),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "generation": self.generation,
+        }
@@ -0,0 +1,211 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.face.gallery import FaceGallery, top_k
+
+GALLERY_MODES = ("full", "prototype")
+GALLERY_DTYPES = ("float32", "float16", "int8")
+
+
+def quantize(matrix: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    스캔용 인코딩 양자화
+    int8 은 행마다 max|x| / 127 스케일을 따로 둔다 (dlib 인코딩은 차원별 범위가 비슷해서 행 단위로 충분).
+    :return: (codes, scales) - int8 이 아니면 scales 는 None
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    return matrix.astype(dtype), None
+
+
+def dequantize(codes: np.ndarray, scales: np.ndarray = None) -> np.ndarray:
+    block = codes.astype(np.float32)
+    if scales is not None:
+        block *= scales[:, None]
+    return block
+
+
+def select_prototypes(rows: np.ndarray, max_exemplars: int = 2, min_distance: float = 0.3) -> np.ndarray:
+    """
+    한 사람의 인코딩들을 대표하는 prototype (centroid + 서로 멀리 떨어진 exemplar 최대 max_exemplars 개)
+    이미 고른 prototype 과 가장 먼 인코딩을 차례로 고르고, 남은 인코딩이 모두 min_distance 안에 들어오면 멈춘다.
+    :param rows: (n, 128) 인코딩
+    :return: (p, 128) prototype, p <= 1 + max_exemplars
+    """
+    rows = np.asarray(rows, dtype=np.float32)
+    if rows.shape[0] == 1:
+        return rows.copy()
+
+    selected = [rows.mean(axis=0)]
+    nearest = np.linalg.norm(rows - selected[0], axis=1)
+    while len(selected) <= max_exemplars:
+        far = int(np.argmax(nearest))
+        if nearest[far] < min_distance:
+            break
+        selected.append(rows[far])
+        nearest = np.minimum(nearest, np.linalg.norm(rows - rows[far], axis=1))
+    return np.stack(selected)
+
+
+class CompactGallery:
+    """
+    스캔 비용과 메모리를 줄인 갤러리
+    전체 인코딩(FaceGallery, 보통 저장소 memory-map) 대신 사람별 prototype 을 float16/int8 로 줄여서 스캔하고,
+    가까운 사람 후보 몇 명의 원래 인코딩만 float32 로 다시 비교(re-rank)한다.
+    결과 인덱스와 거리는 FaceGallery 와 같은 기준(원래 갤러리의 행 번호, 정확 거리)이다.
+    스캔 속도는 prototype 으로 줄어든 행 수만큼 빨라지고, float16/int8 은 메모리를 줄이는 대신
+    블록마다 float32 로 되돌리는 비용이 든다 (python -m benchmarks --suite match 로 비교).
+    """
+
+    def __init__(self, gallery: FaceGallery, mode: str = "prototype", dtype: str = "float16",
+                 max_exemplars: int = 2, min_distance: float = 0.3, rerank: int = 8, block_size: int = 4096):
+        """
+        :param gallery: 원래 인코딩 갤러리 (re-rank 용)
+        :param mode: full (인코딩마다 하나) / prototype (사람별 centroid + exemplar)
+        :param dtype: 스캔 행렬 자료형 (float32 / float16 / int8)
+        :param max_exemplars: 사람별 최대 exemplar 수
+        :param min_distance: 이 거리 안의 인코딩은 이미 고른 prototype 으로 대표되는 것으로 봄
+        :param rerank: 원래 인코딩으로 다시 비교할 사람 후보 수
+        :param block_size: 스캔 시 한 번에 float32 로 되돌리는 행 수
+        """
+        if mode not in GALLERY_MODES:
+            raise ValueError(f"Unknown gallery mode '{mode}'")
+        if dtype not in GALLERY_DTYPES:
+            raise ValueError(f"Unknown gallery dtype '{dtype}'")
+        self.gallery = gallery
+        self.dim = gallery.dim
+        self.mode = mode
+        self.dtype = dtype
+        self.max_exemplars = max_exemplars
+        self.min_distance = min_distance
+        self.rerank = rerank
+        self.block_size = block_size
+
+        # 사람별 원래 행 번호와 prototype
+        self._rows: Dict[str, np.ndarray] = {}
+        self._prototypes: Dict[str, np.ndarray] = {}
+        # 스캔 행렬 (사람 순서대로 이어 붙임)
+        self._members: List[str] = []
+        self._codes = np.empty((0, self.dim), dtype=dtype)
+        self._scales = None
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._owner = np.empty(0, dtype=np.int64)
+
+        self._update_members(0)
+
+    def __len__(self):
+        return len(self.gallery)
+
+    @property
+    def names(self) -> np.ndarray:
+        return self.gallery.names
+
+    @property
+    def encodings(self) -> np.ndarray:
+        return self.gallery.encodings
+
+    @property
+    def nbytes(self) -> int:
+        """
+        스캔 행렬 크기 (원래 갤러리의 encodings.nbytes 와 비교용)
+        """
+        scales = self._scales.nbytes if self._scales is not None else 0
+        return self._codes.nbytes + scales + self._sq_norms.nbytes + self._owner.nbytes
+
+    def _update_members(self, start: int):
+        """
+        start 행부터 추가된 인코딩의 주인만 prototype 을 다시 만들고 스캔 행렬을 재구성
+        """
+        names = self.gallery.names
+        changed = set(names[start:])
+        if not changed:
+            return
+        rows = np.arange(start, len(names))
+        for name in changed:
+            new_rows = rows[names[start:] == name]
+            self._rows[name] = np.concatenate([self._rows.get(name, np.empty(0, dtype=np.int64)), new_rows])
+            encodings = self.gallery.encodings[self._rows[name]]
+            if self.mode == "prototype":
+                self._prototypes[name] = select_prototypes(encodings, self.max_exemplars, self.min_distance)
+            else:
+                self._prototypes[name] = np.asarray(encodings, dtype=np.float32)
+
+        self._members = list(self._prototypes)
+        prototypes = np.concatenate([self._prototypes[name] for name in self._members])
+        self._owner = np.repeat(
+            np.arange(len(self._members)), [len(self._prototypes[name]) for name in self._members]
+        )
+        self._codes, self._scales = quantize(prototypes, self.dtype)
+        restored = dequantize(self._codes, self._scales)
+        self._sq_norms = np.einsum("ij,ij->i", restored, restored)
+
+    def remap(self, matrix: np.ndarray, names: Sequence[str]):
+        start = len(self.gallery)
+        self.gallery.remap(matrix, names)
+        self._update_members(start)
+
+    def extend(self, encodings: Sequence, names: Sequence[str]):
+        start = len(self.gallery)
+        self.gallery.extend(encodings, names)
+        self._update_members(start)
+
+    def add(self, encoding, name: str):
+        self.extend([encoding], [name])
+
+    def _scan(self, q: np.ndarray, count: int) -> np.ndarray:
+        """
+        양자화된 prototype 을 블록 단위로 float32 로 되돌려 비교하고 질의별 가까운 count 개 prototype 번호를 반환
+        블록마다 되돌리므로 float32 임시 행렬은 block_size 행을 넘지 않는다.
+        """
+        rows = self._codes.shape[0]
+        d2 = np.empty((q.shape[0], rows), dtype=np.float32)
+        block = None
+        if self._codes.dtype != np.float32:
+            block = np.empty((min(self.block_size, rows), self.dim), dtype=np.float32)
+        for start in range(0, rows, self.block_size):
+            end = min(start + self.block_size, rows)
+            if self._codes.dtype == np.float32:
+                restored = self._codes[start:end]
+            else:
+                restored = block[:end - start]
+                restored[:] = self._codes[start:end]
+            if self._scales is not None:
+                restored *= self._scales[start:end, None]
+            np.matmul(q, restored.T, out=d2[:, start:end])
+        # |q|^2 은 순위에 영향이 없으므로 |p|^2 - 2 q.p 만 비교
+        d2 *= -2.0
+        d2 += self._sq_norms[None, :]
+        idx, _ = top_k(d2, min(count, rows))
+        return idx
+
+    def search_batch(self, queries, k: int = 1, exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        FaceGallery.search_batch 와 같은 형식의 top-k 검색
+        스캔에서 가까운 사람 후보 rerank 명을 고른 뒤, 그 사람들의 원래 인코딩 전체로 정확한 top-k 를 구한다.
+        """
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        k = min(k, len(self.gallery))
+        if exact or k <= 0 or not self._members:
+            return self.gallery.search_batch(q, k, exact=True)
+
+        # 사람마다 prototype 이 여러 개라서 사람 후보 수보다 넉넉히 스캔
+        per_member = 1 if self.mode == "full" else 1 + self.max_exemplars
+        candidates = self._scan(q, max(self.rerank, k) * per_member)
+
+        indices = np.empty((q.shape[0], k), dtype=np.int64)
+        distances = np.empty((q.shape[0], k), dtype=np.float32)
+        for n, query in enumerate(q):
+            owners = self._owner[candidates[n]]
+            _, first = np.unique(owners, return_index=True)
+            members = owners[np.sort(first)][:self.rerank]
+            rows = np.concatenate([self._rows[self._members[member]] for member in members])
+            if len(rows) < k:
+                rows = np.arange(len(self.gallery))
+            idx, dist = top_k(self.gallery.distances(query, rows), k)
+            indices[n], distances[n] = rows[idx[0]], dist[0]
+        return indices, distances
@@ -0,0 +1,204 @@
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# face_recognition(dlib) 인코딩 차원
+ENCODING_DIM = 128
+
+
+class FaceMatch(NamedTuple):
+    index: int
+    name: str
+    distance: float
+
+
+def top_k(dist: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (M, N) 거리 행렬에서 행별 가장 작은 k 개 위치와 거리 (오름차순)
+    """
+    if k < dist.shape[1]:
+        idx = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(dist.shape[1]), dist.shape).copy()
+    part = np.take_along_axis(dist, idx, axis=1)
+    order = np.argsort(part, axis=1)
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+class FaceGallery:
+    """
+    등록된 얼굴 인코딩 갤러리
+    인코딩은 연속된 (N, 128) float32 행렬 하나에, 이름은 같은 순서의 배열에 보관한다.
+    검색은 행렬 연산 한 번으로 전체 거리를 구한 뒤 top-k 를 고른다.
+    ANN 인덱스(enable_ann)가 있으면 인덱스가 고른 후보만 정확 거리로 비교한다.
+    """
+
+    def __init__(self, encodings: Sequence = None, names: Sequence[str] = None, dim: int = ENCODING_DIM):
+        self.dim = dim
+        self._size = 0
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._names = np.empty(0, dtype=object)
+        self._ann = None
+        if encodings is not None and len(encodings):
+            self.extend(encodings, names)
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray, names: Sequence[str]):
+        """
+        이미 만들어진 (N, 128) float32 행렬(memory-map 등)을 복사하지 않고 갤러리로 사용
+        이후 add/extend 시에만 메모리 행렬로 옮겨진다.
+        """
+        if matrix.shape[0] != len(names):
+            raise ValueError("encodings and names must have the same length")
+        gallery = cls(dim=matrix.shape[1])
+        gallery._matrix = matrix
+        gallery._size = matrix.shape[0]
+        gallery._sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+        gallery._names = np.empty(len(names), dtype=object)
+        gallery._names[:] = list(names)
+        return gallery
+
+    def remap(self, matrix: np.ndarray, names: Sequence[str]):
+        """
+        from_matrix 로 만든 갤러리의 파일 끝에 레코드가 추가된 경우, 새 memory-map 으로 바꾸고 추가된 행만 반영
+        :param matrix: 기존 행을 앞부분에 그대로 포함한 (N, 128) 행렬
+        :param names: N개 이름
+        """
+        start = self._size
+        rows = np.asarray(matrix[start:], dtype=np.float32)
+        new_names = np.empty(rows.shape[0], dtype=object)
+        new_names[:] = list(names[start:])
+
+        self._matrix = matrix
+        self._sq_norms = np.concatenate([self._sq_norms[:start], np.einsum("ij,ij->i", rows, rows)])
+        self._names = np.concatenate([self._names[:start], new_names])
+        self._size = matrix.shape[0]
+
+        if self._ann is not None:
+            if self._ann.needs_training(self._size):
+                self._ann.train(self.encodings)
+            else:
+                self._ann.add(rows, start)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def encodings(self) -> np.ndarray:
+        return self._matrix[:self._size]
+
+    @property
+    def names(self) -> np.ndarray:
+        return self._names[:self._size]
+
+    def _reserve(self, capacity: int):
+        """
+        행렬 용량 확보 (2배씩 늘려서 append 비용을 분할상환)
+        :param capacity: 필요한 최소 행 수
+        """
+        if capacity <= self._matrix.shape[0]:
+            return
+        capacity = max(capacity, self._matrix.shape[0] * 2, 64)
+
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        names = np.empty(capacity, dtype=object)
+        names[:self._size] = self._names[:self._size]
+
+        self._matrix, self._sq_norms, self._names = matrix, sq_norms, names
+
+    def add(self, encoding, name: str):
+        self.extend([encoding], [name])
+
+    def extend(self, encodings: Sequence, names: Sequence[str]):
+        """
+        인코딩 여러 개 추가
+        :param encodings: (M, 128) 인코딩
+        :param names: 인코딩과 같은 순서의 이름 M개
+        """
+        rows = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        if names is None or len(names) != rows.shape[0]:
+            raise ValueError("encodings and names must have the same length")
+
+        start, end = self._size, self._size + rows.shape[0]
+        self._reserve(end)
+        self._matrix[start:end] = rows
+        self._sq_norms[start:end] = np.einsum("ij,ij->i", rows, rows)
+        self._names[start:end] = list(names)
+        self._size = end
+
+        if self._ann is not None:
+            if self._ann.needs_training(self._size):
+                self._ann.train(self.encodings)
+            else:
+                self._ann.add(rows, start)
+
+    def enable_ann(self, index):
+        """
+        근사 최근접 탐색 인덱스 사용 (app.face.ann.IVFIndex)
+        갤러리가 인덱스의 min_train_size 보다 작으면 학습될 때까지 정확 검색을 사용한다.
+        """
+        self._ann = index
+        if index.needs_training(self._size):
+            index.train(self.encodings)
+
+    def distances(self, queries, rows: np.ndarray = None) -> np.ndarray:
+        """
+        질의 인코딩과 갤러리의 유클리드 거리
+        |q - g|^2 = |q|^2 - 2 q.g + |g|^2 로 풀어서 행렬곱 한 번으로 계산한다.
+        :param queries: (M, 128) 또는 (128,) 인코딩
+        :param rows: 비교할 갤러리 인덱스 (없으면 전체)
+        :return: (M, N) 거리 행렬
+        """
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        if rows is None:
+            matrix, sq_norms = self.encodings, self._sq_norms[:self._size]
+        else:
+            matrix, sq_norms = self._matrix[rows], self._sq_norms[rows]
+        sq = np.einsum("ij,ij->i", q, q)
+        d2 = q @ matrix.T
+        d2 *= -2.0
+        d2 += sq[:, None]
+        d2 += sq_norms[None, :]
+        np.maximum(d2, 0.0, out=d2)
+        return np.sqrt(d2, out=d2)
+
+    def search_batch(self, queries, k: int = 1, exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        질의별 가장 가까운 k 개 검색
+        :param queries: (M, 128) 또는 (128,) 인코딩
+        :param k: 반환할 후보 수
+        :param exact: True 면 ANN 인덱스가 있어도 전체를 비교
+        :return: (M, k) 인덱스, (M, k) 거리 (거리 오름차순, 갤러리가 k 보다 작으면 갤러리 크기만큼)
+        """
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        k = min(k, self._size)
+        if k <= 0:
+            return np.empty((q.shape[0], 0), dtype=np.int64), np.empty((q.shape[0], 0), dtype=np.float32)
+
+        if exact or self._ann is None or not self._ann.trained:
+            return top_k(self.distances(q), k)
+
+        indices = np.empty((q.shape[0], k), dtype=np.int64)
+        distances = np.empty((q.shape[0], k), dtype=np.float32)
+        for n, query in enumerate(q):
+            candidates = self._ann.candidates(query)
+            if len(candidates) < k:
+                candidates = np.arange(self._size)
+            idx, dist = top_k(self.distances(query, candidates), k)
+            indices[n], distances[n] = candidates[idx[0]], dist[0]
+        return indices, distances
+
+    def search(self, encoding, k: int = 1) -> List[FaceMatch]:
+        """
+        인코딩 하나에 대한 top-k 검색
+        :param encoding: (128,) 인코딩
+        :param k: 반환할 후보 수
+        :return: 거리 오름차순 FaceMatch 리스트
+        """
+        idx, dist = self.search_batch(encoding, k)
+        return [FaceMatch(int(i), self._names[i], float(d)) for i, d in zip(idx[0], dist[0])]
+
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import FastAPI
+
+from app.face import worker
+
+
+class FacePool:
+    """
+    얼굴 인식 파이프라인 실행용 프로세스 풀
+    검출/인코딩은 수백 ms 의 CPU 작업이라 이벤트 루프에서 직접 실행하면 다른 API 가 모두 멈춘다.
+    요청은 풀에 future 로 넘기고 결과만 await 한다.
+    FACE_POOL_SIZE 가 0 이면 프로세스 풀 대신 기본 스레드 풀에서 실행한다.
+    """
+
+    def __init__(self, app: FastAPI = None, **kwargs):
+        self._executor = None
+        self._size = 0
+        if app is not None:
+            self.init_app(app=app, **kwargs)
+
+    def init_app(self, app: FastAPI, **kwargs):
+        self._size = kwargs.setdefault("FACE_POOL_SIZE", 1)
+        prewarm = kwargs.setdefault("FACE_POOL_PREWARM", False)
+
+        @app.on_event("startup")
+        def startup():
+            # 기본은 첫 얼굴 인식 요청 때 워커를 띄움
+            if prewarm:
+                self.start()
+
+        @app.on_event("shutdown")
+        def shutdown():
+            self.shutdown()
+
+    def start(self):
+        if self._executor is not None or self._size <= 0:
+            return
+        # dlib 모델을 fork 로 공유하지 않도록 spawn 으로 워커 생성
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=worker.init_worker,
+        )
+        # 워커를 미리 띄워서 첫 요청이 모델 로드 시간을 기다리지 않게 함
+        for _ in range(self._size):
+            self._executor.submit(worker.warm_up)
+        logging.info(f"Face pool started. (workers: {self._size})")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logging.info("Face pool stopped.")
+
+    async def run(self, fn, *args):
+        """
+        워커 함수를 풀에서 실행하고 결과를 기다림
+        :param fn: app.face.worker 의 모듈 함수 (프로세스 간 전달 가능해야 함)
+        """
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def map_chunks(self, fn, items: list, *args):
+        """
+        items 를 워커 수만큼 묶어서 병렬 실행 후 원래 순서대로 결과를 합침
+        :param fn: 리스트(와 args)를 받아 같은 길이의 결과 리스트를 반환하는 워커 함수
+        """
+        if not items:
+            return []
+        chunk_count = min(len(items), max(self._size, 1))
+        chunk_size = -(-len(items) // chunk_count)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        results = await asyncio.gather(*(self.run(fn, chunk, *args) for chunk in chunks))
+        return [result for chunk_result in results for result in chunk_result]
+
+    @property
+    def size(self):
+        return self._size
+
+
+face_pool = FacePool()
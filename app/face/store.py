@@ -0,0 +1,349 @@
+import json
+import mmap
+import os
+import pickle
+import struct
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.face.gallery import ENCODING_DIM
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경 (워커 1개 기준, 파일 잠금 없음)
+    fcntl = None
+
+# 인코딩 파일 헤더: magic, version, dim, token(사이드카와 짝을 맞추는 값), 예약 영역
+HEADER_FORMAT = "<4sHHQ16x"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b"FVEC"
+VERSION = 1
+GENERATION_FORMAT = "<Q"
+
+
+class FaceStore:
+    """
+    추가 전용(append-only) 얼굴 인코딩 저장소
+    - <path>.fvec : 헤더 + 고정 길이 float32 인코딩 레코드 (memory-map 으로 읽음)
+    - <path>.meta : 이름 사이드카 (JSON lines, 첫 줄은 token, 이후 레코드 순서대로 한 줄씩, 삭제는 tombstone 줄)
+                    이름과 회원(Members.id) 연결은 레코드 줄의 members_id 또는 link 줄로 기록
+    - <path>.gen  : 변경될 때마다 증가하는 generation 카운터 (모든 워커가 memory-map 으로 공유)
+    - <path>.lock : 워커 간 쓰기 잠금
+    등록은 두 파일 끝에 덧붙이기만 하고, 삭제는 삭제 표시를 기록한 뒤 compaction 으로 파일을 다시 쓴다.
+    여러 uvicorn 워커가 같은 파일을 memory-map 하므로 인코딩은 page cache 한 벌만 사용하고,
+    각 워커는 generation 이 바뀌었을 때만 refresh() 로 추가된 레코드를 반영한다.
+    """
+
+    def __init__(self, path: str, dim: int = ENCODING_DIM):
+        self.path = path
+        self.dim = dim
+        self.vec_path = f"{path}.fvec"
+        self.meta_path = f"{path}.meta"
+        self.gen_path = f"{path}.gen"
+        self.lock_path = f"{path}.lock"
+        self.record_size = dim * np.dtype(np.float32).itemsize
+        self._token = None
+        self._names: List[str] = []
+        self._members: Dict[str, int] = {}
+        self._deleted = set()
+        self._meta_offset = 0
+        self._compacted = False
+        self._generation_map = None
+        self.synced_generation = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.vec_path) and os.path.exists(self.meta_path)
+
+    @property
+    def rows(self) -> int:
+        return len(self._names)
+
+    @property
+    def deleted(self) -> int:
+        return len(self._deleted)
+
+    @contextmanager
+    def _lock(self, exclusive: bool = True):
+        """
+        워커 간 잠금 (쓰기는 배타, refresh 는 공유)
+        """
+        with open(self.lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def open(self, legacy_pickle_path: str = None):
+        """
+        저장소 열기 (없으면 빈 저장소 생성)
+        중단된 compaction 을 마무리하고, 비정상 종료로 남은 불완전한 레코드와 삭제 표시를 정리한다.
+        :param legacy_pickle_path: 저장소가 없을 때 1회 이전할 기존 pickle 파일(known_faces.dat)
+        """
+        with self._lock():
+            if legacy_pickle_path:
+                self._migrate_pickle(legacy_pickle_path)
+            if not self.exists():
+                self._replace_files(np.empty((0, self.dim), dtype=np.float32), [])
+
+            token = self._read_header(self.vec_path)
+            if self._read_meta_token(self.meta_path) != token and os.path.exists(self.meta_path + ".tmp"):
+                # 인코딩 파일 교체 후 사이드카 교체 전에 중단된 경우
+                if self._read_meta_token(self.meta_path + ".tmp") == token:
+                    os.replace(self.meta_path + ".tmp", self.meta_path)
+            if self._read_meta_token(self.meta_path) != token:
+                raise Exception(f"face store sidecar does not match '{self.vec_path}'")
+
+            self._token = token
+            self._load_meta(repair=True)
+
+            # 사이드카 기록 전에 중단되어 남은 인코딩 레코드는 잘라냄
+            vec_rows = (os.path.getsize(self.vec_path) - HEADER_SIZE) // self.record_size
+            if vec_rows < self.rows:
+                del self._names[vec_rows:]
+                self._deleted = {row for row in self._deleted if row < vec_rows}
+            if os.path.getsize(self.vec_path) != HEADER_SIZE + self.rows * self.record_size:
+                with open(self.vec_path, "r+b") as f:
+                    f.truncate(HEADER_SIZE + self.rows * self.record_size)
+
+            self._open_generation()
+            if self._compact():
+                self._bump_generation()
+            self.synced_generation = self.generation()
+            self._compacted = False
+        return self
+
+    def _open_generation(self):
+        if not os.path.exists(self.gen_path):
+            with open(self.gen_path, "wb") as f:
+                f.write(struct.pack(GENERATION_FORMAT, 0))
+        with open(self.gen_path, "r+b") as f:
+            self._generation_map = mmap.mmap(f.fileno(), struct.calcsize(GENERATION_FORMAT))
+
+    def generation(self) -> int:
+        """
+        현재 generation (공유 memory-map 에서 8바이트만 읽으므로 요청마다 호출해도 됨)
+        """
+        return struct.unpack_from(GENERATION_FORMAT, self._generation_map, 0)[0]
+
+    def _bump_generation(self):
+        struct.pack_into(GENERATION_FORMAT, self._generation_map, 0, self.generation() + 1)
+
+    def _read_header(self, vec_path: str) -> int:
+        with open(vec_path, "rb") as f:
+            magic, version, dim, token = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION or dim != self.dim:
+            raise Exception(f"invalid face store file '{vec_path}'")
+        return token
+
+    @staticmethod
+    def _read_meta_token(meta_path: str):
+        try:
+            with open(meta_path, "rb") as f:
+                return json.loads(f.readline())["token"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def _load_meta(self, repair: bool = False, incremental: bool = False):
+        """
+        사이드카 읽기
+        :param repair: 기록 도중 중단된 마지막 줄을 잘라냄 (배타 잠금 상태에서만)
+        :param incremental: 마지막으로 읽은 위치 이후에 추가된 줄만 읽음
+        """
+        if not incremental:
+            self._names = []
+            self._members = {}
+            self._deleted = set()
+        with open(self.meta_path, "r+b" if repair else "rb") as f:
+            if incremental:
+                f.seek(self._meta_offset)
+                offset = self._meta_offset
+            else:
+                offset = len(f.readline())
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # 기록 도중 중단된 마지막 줄은 잘라내서 다음 append 와 섞이지 않게 함
+                    if repair:
+                        f.truncate(offset)
+                    break
+                offset += len(line)
+                record = json.loads(line)
+                if "deleted" in record:
+                    self._deleted.add(record["deleted"])
+                elif "link" in record:
+                    self._members[record["link"]] = record["members_id"]
+                else:
+                    self._names.append(record["name"])
+                    if record.get("members_id") is not None:
+                        self._members[record["name"]] = record["members_id"]
+        self._meta_offset = offset
+
+    def _sync(self) -> bool:
+        """
+        다른 워커의 변경 반영 (잠금 상태에서 호출)
+        :return: 파일이 교체(compaction)되어 처음부터 다시 읽었는지 여부
+        """
+        token = self._read_header(self.vec_path)
+        replaced = token != self._token
+        self._token = token
+        self._load_meta(incremental=not replaced)
+        return replaced
+
+    def refresh(self) -> bool:
+        """
+        generation 이 바뀌었을 때 호출: 추가된 레코드(또는 교체된 파일)를 다시 읽음
+        :return: 파일이 교체되어 갤러리를 다시 구성해야 하는지 여부 (False 면 끝에 레코드가 추가된 것뿐)
+        """
+        with self._lock(exclusive=False):
+            self.synced_generation = self.generation()
+            # 이 워커가 compaction 한 경우 토큰은 이미 새 파일 기준이라 _sync() 만으로는 알 수 없음
+            compacted, self._compacted = self._compacted, False
+            return self._sync() or compacted
+
+    def _record(self, name: str) -> dict:
+        record = {"name": name}
+        if name in self._members:
+            record["members_id"] = self._members[name]
+        return record
+
+    def _write_files(self, vec_path: str, meta_path: str, encodings: np.ndarray, names: Sequence[str]) -> int:
+        token = uuid.uuid4().int & 0xFFFFFFFFFFFFFFFF
+        with open(vec_path, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.dim, token))
+            f.write(np.ascontiguousarray(encodings, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(meta_path, "wb") as f:
+            f.write(json.dumps({"token": token}).encode() + b"\n")
+            f.write(b"".join(json.dumps(self._record(name), ensure_ascii=False).encode() + b"\n" for name in names))
+            f.flush()
+            os.fsync(f.fileno())
+        return token
+
+    def _replace_files(self, encodings: np.ndarray, names: Sequence[str]) -> int:
+        """
+        임시 파일을 모두 쓴 뒤 인코딩 파일 -> 사이드카 순서로 교체
+        교체 사이에 중단되면 open() 에서 남은 사이드카 임시 파일로 마무리한다.
+        다른 워커가 memory-map 중인 기존 파일은 unmap 될 때까지 그대로 남는다.
+        """
+        token = self._write_files(self.vec_path + ".tmp", self.meta_path + ".tmp", encodings, names)
+        os.replace(self.vec_path + ".tmp", self.vec_path)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+        return token
+
+    def _append_meta(self, records: List[dict]):
+        with open(self.meta_path, "ab") as f:
+            f.write(b"".join(json.dumps(r, ensure_ascii=False).encode() + b"\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+            self._meta_offset = f.tell()
+
+    def append(self, encodings, names: Sequence[str], members_id: Optional[int] = None) -> range:
+        """
+        인코딩 추가 (파일 끝에 덧붙이기만 함)
+        인코딩 레코드를 먼저 기록하고 사이드카를 기록하므로, 중간에 중단되어도 기존 데이터는 유지된다.
+        :param members_id: 추가하는 이름들과 연결할 회원 id (없으면 기존 연결 유지)
+        :return: 추가된 레코드 번호 범위
+        """
+        rows = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        if len(names) != rows.shape[0]:
+            raise ValueError("encodings and names must have the same length")
+
+        with self._lock():
+            self._sync()
+            start = self.rows
+            with open(self.vec_path, "ab") as f:
+                f.write(rows.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            if members_id is not None:
+                self._members.update({name: members_id for name in names})
+            self._append_meta([
+                {"name": name, "members_id": members_id} if members_id is not None else {"name": name}
+                for name in names
+            ])
+            self._names.extend(names)
+            self._bump_generation()
+        return range(start, start + rows.shape[0])
+
+    def link_member(self, name: str, members_id: int):
+        """
+        이미 등록된 이름을 회원과 연결 (얼굴 체크인에서 사용)
+        인코딩은 바뀌지 않지만 다른 워커가 연결을 반영하도록 generation 을 올린다.
+        """
+        with self._lock():
+            self._sync()
+            self._append_meta([{"link": name, "members_id": members_id}])
+            self._members[name] = members_id
+            self._bump_generation()
+
+    def member_id(self, name: str) -> Optional[int]:
+        return self._members.get(name)
+
+    def delete_name(self, name: str) -> int:
+        """
+        이름이 같은 레코드를 모두 삭제
+        삭제 표시를 먼저 기록한 뒤 바로 compaction 하므로, 중간에 중단되어도 다음 open() 에서 정리된다.
+        :return: 삭제된 레코드 수
+        """
+        with self._lock():
+            self._sync()
+            rows = [row for row in self.live_rows() if self._names[row] == name]
+            if rows:
+                self._append_meta([{"deleted": int(row)} for row in rows])
+                self._deleted.update(rows)
+                self._members.pop(name, None)
+                self._compact()
+                self._bump_generation()
+        return len(rows)
+
+    def _compact(self) -> bool:
+        """
+        삭제 표시된 레코드를 제거하고 파일을 다시 씀 (배타 잠금 상태에서 호출)
+        """
+        if not self._deleted:
+            return False
+        live = self.live_rows()
+        encodings = np.array(self.mmap()[live])
+        names = [self._names[row] for row in live]
+
+        self._token = self._replace_files(encodings, names)
+        self._names = names
+        live_names = set(names)
+        self._members = {name: members_id for name, members_id in self._members.items() if name in live_names}
+        self._deleted = set()
+        self._meta_offset = os.path.getsize(self.meta_path)
+        self._compacted = True
+        return True
+
+    def live_rows(self) -> np.ndarray:
+        return np.array([row for row in range(self.rows) if row not in self._deleted], dtype=np.int64)
+
+    def mmap(self) -> np.ndarray:
+        """
+        인코딩 파일 전체를 (rows, dim) 읽기 전용 memory-map 으로 반환
+        """
+        if self.rows == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(self.vec_path, dtype=np.float32, mode="r", offset=HEADER_SIZE, shape=(self.rows, self.dim))
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def _migrate_pickle(self, pickle_path: str) -> bool:
+        """
+        기존 pickle 파일(known_faces.dat)을 저장소로 1회 이전
+        저장소가 이미 있거나 pickle 파일이 없으면 아무것도 하지 않는다.
+        """
+        if self.exists() or not os.path.exists(pickle_path):
+            return False
+        with open(pickle_path, "rb") as f:
+            encodings, names = pickle.load(f)
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        self._replace_files(encodings, list(names))
+        return True
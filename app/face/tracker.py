@@ -0,0 +1,102 @@
+from itertools import count
+from typing import List, Optional
+
+
+def iou(a, b) -> float:
+    """
+    두 얼굴 박스 (top, right, bottom, left) 의 IoU
+    """
+    top, right = max(a[0], b[0]), min(a[1], b[1])
+    bottom, left = min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, right - left) * max(0, bottom - top)
+    if inter == 0:
+        return 0.0
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    return inter / float(area_a + area_b - inter)
+
+
+class Track:
+    def __init__(self, track_id: int, location, tick: int):
+        self.id = track_id
+        self.location = location
+        self.name = None
+        self.similarity_percent = 0.0
+        self.last_seen = tick
+        self.verified = None
+
+    def to_dict(self) -> dict:
+        top, right, bottom, left = self.location
+        return {
+            "track_id": self.id,
+            "name": self.name,
+            "similarity_percent": self.similarity_percent,
+            "location": {"top": top, "right": right, "bottom": bottom, "left": left},
+        }
+
+
+class FaceTracker:
+    """
+    스트리밍 인식용 IoU 기반 얼굴 추적기
+    이미 이름이 확인된 얼굴은 다음 프레임에서 박스가 겹치면 같은 사람으로 보고 인코딩을 생략한다.
+    일정 주기(reverify_ticks)마다는 다시 인코딩해서 이름을 확인한다.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_missed: int = 10, reverify_ticks: int = 30):
+        """
+        :param iou_threshold: 같은 얼굴로 볼 최소 IoU
+        :param max_missed: 이 횟수만큼 처리한 프레임에서 보이지 않으면 추적 종료
+        :param reverify_ticks: 이름 재확인 주기 (처리한 프레임 수)
+        """
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.reverify_ticks = reverify_ticks
+        self.tick = 0
+        self._ids = count(1)
+        self._tracks: List[Track] = []
+
+    def skip_boxes(self, unknown_name: str = None) -> list:
+        """
+        인코딩을 생략해도 되는 박스 (이름이 확인되었고 재확인 주기가 지나지 않은 추적 대상)
+        """
+        return [
+            track.location for track in self._tracks
+            if track.name and track.name != unknown_name and self.tick - track.verified < self.reverify_ticks
+        ]
+
+    def _match(self, location) -> Optional[Track]:
+        best, best_iou = None, self.iou_threshold
+        for track in self._tracks:
+            overlap = iou(track.location, location)
+            if overlap >= best_iou and track.last_seen < self.tick:
+                best, best_iou = track, overlap
+        return best
+
+    def update(self, locations: list, recognized: list) -> List[dict]:
+        """
+        처리한 프레임의 검출 결과 반영
+        :param locations: 검출된 얼굴 박스
+        :param recognized: 박스별 인식 결과 (match_faces 결과 dict, 인코딩을 생략한 얼굴은 None)
+        :return: 이벤트 리스트 (recognized: 새 얼굴이거나 이름이 바뀜, lost: 추적 종료)
+        """
+        self.tick += 1
+        events = []
+        for location, face in zip(locations, recognized):
+            track = self._match(location)
+            if track is None:
+                track = Track(next(self._ids), location, self.tick)
+                self._tracks.append(track)
+            track.location = location
+            track.last_seen = self.tick
+            if face is None:
+                continue
+            track.verified = self.tick
+            if face["name"] != track.name:
+                track.name = face["name"]
+                track.similarity_percent = face["similarity_percent"]
+                events.append({"event": "recognized", **track.to_dict()})
+
+        for track in [t for t in self._tracks if self.tick - t.last_seen >= self.max_missed]:
+            self._tracks.remove(track)
+            events.append({"event": "lost", "track_id": track.id, "name": track.name})
+        return events
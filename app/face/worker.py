@@ -0,0 +1,155 @@
+"""
+얼굴 인식 파이프라인 워커 함수
+프로세스 풀의 각 워커에서 실행된다. cv2 / face_recognition(dlib 모델)은 워커 시작 시 한 번만 로드하고,
+API 프로세스에서는 이 모듈을 import 해도 무거운 라이브러리를 불러오지 않는다.
+"""
+import numpy as np
+
+from app.face.gallery import ENCODING_DIM
+from app.face.tracker import iou
+
+_cv2 = None
+_face_recognition = None
+
+
+def load_cv2():
+    """
+    디코딩만 하는 경우(perceptual hash, 벤치마크 decode 단계)는 dlib 모델 없이 cv2 만 로드
+    """
+    global _cv2
+    if _cv2 is None:
+        import cv2
+        _cv2 = cv2
+
+
+def init_worker():
+    """
+    워커 초기화: cv2, face_recognition import (dlib 모델 로드) 후 작은 이미지로 한 번 실행해 둔다.
+    """
+    global _face_recognition
+    if _face_recognition is not None:
+        return
+    load_cv2()
+    import face_recognition
+
+    face_recognition.face_locations(np.zeros((32, 32, 3), dtype=np.uint8))
+    _face_recognition = face_recognition
+
+
+def warm_up():
+    init_worker()
+    return True
+
+
+def decode_image(image_bytes: bytes, reduce: int = 1, max_width: int = 0):
+    """
+    이미지 바이트를 RGB 배열로 디코딩
+    :param reduce: 디코딩 단계 축소 배율 (1, 2, 4, 8 - JPEG 는 DCT 단계에서 축소되어 전체 해상도로 풀지 않음)
+    :param max_width: 디코딩 후 너비가 이보다 크면 이 너비로 축소 (0 이면 제한 없음)
+    :return: RGB 배열, 원본 좌표 배율 (작업 이미지 좌표 * 배율 = 원본 좌표)
+    """
+    load_cv2()
+    flags = {
+        1: _cv2.IMREAD_COLOR,
+        2: _cv2.IMREAD_REDUCED_COLOR_2,
+        4: _cv2.IMREAD_REDUCED_COLOR_4,
+        8: _cv2.IMREAD_REDUCED_COLOR_8,
+    }
+    image_array = np.frombuffer(image_bytes, dtype=np.uint8)
+    frame = _cv2.imdecode(image_array, flags.get(reduce, _cv2.IMREAD_COLOR))
+    if frame is None:
+        raise ValueError("Could not decode image")
+
+    scale = float(reduce if reduce in flags else 1)
+    height, width = frame.shape[:2]
+    if max_width and width > max_width:
+        ratio = max_width / width
+        frame = _cv2.resize(frame, (max_width, max(1, round(height * ratio))), interpolation=_cv2.INTER_AREA)
+        scale /= ratio
+    return _cv2.cvtColor(frame, _cv2.COLOR_BGR2RGB), scale
+
+
+def perceptual_hash(image_bytes: bytes) -> str:
+    """
+    64bit dHash (축소 흑백 디코딩 -> 9x8 -> 인접 픽셀 밝기 비교) + 축소 디코딩 크기
+    다시 인코딩된 JPEG 처럼 바이트는 달라도 같은 이미지는 같은 값이 나온다.
+    캐시된 얼굴 위치는 원본 좌표이므로 크기가 다른(축소/확대된) 이미지는 다른 값이 되도록 크기를 붙인다.
+    (1/4 축소 크기 기준이라 원본 크기 차이가 4px 미만인 이미지는 같은 크기로 본다)
+    """
+    load_cv2()
+    image_array = np.frombuffer(image_bytes, dtype=np.uint8)
+    gray = _cv2.imdecode(image_array, _cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        raise ValueError("Could not decode image")
+    small = _cv2.resize(gray, (9, 8), interpolation=_cv2.INTER_AREA)
+    height, width = gray.shape[:2]
+    return f"{width}x{height}:{np.packbits(small[:, 1:] > small[:, :-1]).tobytes().hex()}"
+
+
+def scale_location(location, scale: float):
+    """
+    작업 이미지 기준 (top, right, bottom, left) 를 원본 이미지 좌표로 변환
+    """
+    return tuple(max(0, int(round(v * scale))) for v in location)
+
+
+def detect_and_encode(image_bytes: bytes, profile: dict = None) -> dict:
+    """
+    디코딩 -> 얼굴 위치 검출 -> 인코딩
+    :param image_bytes: 업로드된 이미지 바이트
+    :param profile: 검출 프로파일 (consts.FACE_DETECTION_PROFILES 의 값, 없으면 전체 해상도 기본 설정)
+    :return: locations: 원본 좌표 [(top, right, bottom, left)], encodings: (N, 128) float32
+    """
+    init_worker()
+    profile = profile or {}
+    rgb_frame, scale = decode_image(image_bytes, profile.get("reduce", 1), profile.get("max_width", 0))
+    face_locations = _face_recognition.face_locations(
+        rgb_frame,
+        number_of_times_to_upsample=profile.get("upsample", 1),
+        model=profile.get("model", "hog"),
+    )
+    face_encodings = _face_recognition.face_encodings(rgb_frame, face_locations)
+    encodings = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    return {"locations": [scale_location(loc, scale) for loc in face_locations], "encodings": encodings}
+
+
+def detect_and_encode_batch(images: list, profile: dict = None) -> list:
+    """
+    여러 이미지를 워커 하나에서 순서대로 처리 (요청/IPC 오버헤드를 이미지 묶음 단위로 줄임)
+    :param images: 이미지 바이트 리스트
+    :param profile: 검출 프로파일
+    :return: 이미지별 detect_and_encode 결과, 실패한 이미지는 {"error": 메시지}
+    """
+    results = []
+    for image_bytes in images:
+        try:
+            results.append(detect_and_encode(image_bytes, profile))
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+def detect_and_encode_tracked(image_bytes: bytes, profile: dict = None, skip_boxes: list = None,
+                              iou_threshold: float = 0.3) -> dict:
+    """
+    스트리밍용 검출 -> 인코딩: 이미 추적 중인 얼굴(skip_boxes 와 겹치는 박스)은 인코딩을 생략
+    :param skip_boxes: 원본 좌표 기준 추적 중인 얼굴 박스
+    :return: locations: 검출된 전체 박스, encoded: 인코딩한 박스 번호, encodings: (len(encoded), 128) float32
+    """
+    init_worker()
+    profile = profile or {}
+    skip_boxes = skip_boxes or []
+    rgb_frame, scale = decode_image(image_bytes, profile.get("reduce", 1), profile.get("max_width", 0))
+    face_locations = _face_recognition.face_locations(
+        rgb_frame,
+        number_of_times_to_upsample=profile.get("upsample", 1),
+        model=profile.get("model", "hog"),
+    )
+    locations = [scale_location(loc, scale) for loc in face_locations]
+    encoded = [
+        n for n, location in enumerate(locations)
+        if all(iou(location, box) < iou_threshold for box in skip_boxes)
+    ]
+    face_encodings = _face_recognition.face_encodings(rgb_frame, [face_locations[n] for n in encoded])
+    encodings = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    return {"locations": locations, "encoded": encoded, "encodings": encodings}
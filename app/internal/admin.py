@@ -1,8 +1,37 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.database.conn import db
+from app.database.count import count_cache
+from app.database.crud import reconcile_remaining_sessions
+from app.database.explain import explain_hot_queries
 
 router = APIRouter()
 
 
-@router.post("/")
-async def update_admin():
-    return {"message": "Admin getting schwifty"}
\ No newline at end of file
+# DB 커넥션 풀 통계 (checkout 중인 연결, overflow, checkout 대기 시간, 연결 생성/종료 횟수)
+@router.get("/db/pool")
+async def get_db_pool_stats():
+    return JSONResponse(content=db.pool_stats())
+
+
+# 목록 API total_count 전략과 캐시 적중률
+@router.get("/db/count-cache")
+async def get_count_cache_stats():
+    return JSONResponse(content=count_cache.stats())
+
+
+# course.remaining_sessions 재계산 (class_booking 기준, 값이 다른 수강만 갱신) - 주기 작업(cron)에서 호출
+@router.post("/db/reconcile/remaining-sessions")
+async def reconcile_course_remaining_sessions(session=Depends(db.async_session)):
+    fixed = await reconcile_remaining_sessions(session)
+    if fixed:
+        count_cache.invalidate("course")
+    return JSONResponse(content={"fixed": fixed})
+
+
+# 자주 쓰는 조회의 실행 계획 확인 (MySQL) - 전체 스캔하는 쿼리가 있으면 500 (배포 후 점검/CI 에서 호출)
+@router.get("/db/explain")
+async def get_hot_query_plans(session=Depends(db.async_session)):
+    result = await explain_hot_queries(session)
+    return JSONResponse(content=result, status_code=200 if result["ok"] else 500)
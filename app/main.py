@@ -4,9 +4,10 @@ from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.database.conn import db
+from app.database.count import count_cache
 from dependencies import get_query_token, get_token_header
 from internal import admin
-from routers import course, auth, members, classBooking, faceAi
+from routers import course, auth, members, classBooking
 from app.common.config import conf
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
@@ -32,6 +33,7 @@ c = conf()
 app = FastAPI()
 conf_dict = asdict(c)
 db.init_app(app, **conf_dict)
+count_cache.init_app(app, **conf_dict)
 
 # CORS 설정 추가
 app.add_middleware(
@@ -46,7 +48,17 @@ app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(members.router, prefix="/members", tags=["members"], dependencies=[Depends(verify_token)])
 app.include_router(course.router, prefix="/course", tags=["course"], dependencies=[Depends(verify_token)])
 app.include_router(classBooking.router, prefix="/class-booking", tags=["class-booking"], dependencies=[Depends(verify_token)])
-app.include_router(faceAi.router, prefix="/face-ai", tags=["face-ai"])
+app.include_router(admin.router, prefix="/internal", tags=["internal"], dependencies=[Depends(verify_token)])
+
+# 얼굴 인식 API 는 설정으로 켠 경우에만 불러옴 (갤러리와 dlib 모델은 첫 요청 시 로드)
+if c.FACE_AI_ENABLED:
+    from app.face.attendance import attendance_buffer
+    from app.face.pool import face_pool
+    from routers import faceAi
+
+    face_pool.init_app(app, **conf_dict)
+    attendance_buffer.init_app(app, **conf_dict)
+    app.include_router(faceAi.router, prefix="/face-ai", tags=["face-ai"])
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
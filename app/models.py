@@ -1,4 +1,4 @@
-from datetime import date, datetime
+from datetime import date, datetime, time
 from enum import Enum
 from typing import List, Optional, Any
 from pydantic.main import BaseModel
@@ -51,6 +51,24 @@ class ClassBookingPatch(BaseModel):
     reservation_date: Optional[datetime] = None
     enrollment_status: Optional[str] = None
 
+class ClassBookingSchedule(BaseModel):
+    course_id: int
+    weekdays: List[int]  # 수업 요일 (0: 월 ~ 6: 일)
+    time: time  # 수업 시각
+    start_date: date
+    end_date: date
+    skip_dates: List[date] = []  # 휴강일
+    enrollment_status: str = "1"
+
+class ClassBookingStatusPatch(BaseModel):
+    # 대상: ids 또는 검색 조건 (reservation_date, class_type, course_id) 중 하나 이상
+    ids: Optional[List[int]] = None
+    reservation_date: Optional[date] = None
+    class_type: Optional[str] = None
+    course_id: Optional[int] = None
+    from_status: str = "1"
+    to_status: str
+
 
 class SnsType(str, Enum):
     email: str = "email"
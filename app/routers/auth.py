@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import logging
 # TODO:
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import JSONResponse
 
 from app.common.consts import JWT_SECRET, JWT_ALGORITHM
@@ -19,7 +19,7 @@ router = APIRouter()
 security = HTTPBearer()
 
 @router.post("/register/{sns_type}", status_code=201, response_model=CustomResponse)
-async def register(sns_type: SnsType, reg_info: UserRegister, session: Session = Depends(db.session)):
+async def register(sns_type: SnsType, reg_info: UserRegister, session: AsyncSession = Depends(db.async_session)):
     """
     `회원가입 API`\n
     :param sns_type:
@@ -29,14 +29,14 @@ async def register(sns_type: SnsType, reg_info: UserRegister, session: Session =
     """
     try:
         if sns_type == SnsType.email:
-            is_exist = await is_email_exist(reg_info.email)
+            is_exist = await is_email_exist(reg_info.email, session)
             if not reg_info.email or not reg_info.pw:
                 raise HTTPException(status_code=400, detail="메일 또는 비밀번호 정보가 없습니다.")
             if is_exist:
                 raise HTTPException(status_code=400, detail="가입된 메일 정보")
 
             hash_pw = bcrypt.hashpw(reg_info.pw.encode("utf-8"), bcrypt.gensalt())
-            new_user = Users.create(session, auto_commit=True, pw=hash_pw, email=reg_info.email, sns_type="E", name=reg_info.name)
+            new_user = await Users.acreate(session, auto_commit=True, pw=hash_pw, email=reg_info.email, sns_type="E", name=reg_info.name)
 
             # 필드 일치 여부 확인
             try:
@@ -83,15 +83,15 @@ def get_user(email: str):
         )
 
 @router.post("/login/{sns_type}", status_code=200, tags=["auth"], response_model=CustomResponse)
-async def login(sns_type: SnsType, user_info: UserRegister):
+async def login(sns_type: SnsType, user_info: UserRegister, session: AsyncSession = Depends(db.async_session)):
     try:
         if sns_type == SnsType.email:
-            is_exist = await is_email_exist(user_info.email)
             if not user_info.email or not user_info.pw:
                 raise HTTPException(status_code=400, detail="Email and PW must be provided")
-            if not is_exist:
+            # 가입 여부 확인과 사용자 조회를 한 번에 (조회 1번)
+            user = await Users.aget(session, email=user_info.email)
+            if not user:
                 raise HTTPException(status_code=400, detail="NO_MATCH_USER")
-            user = Users.get(email=user_info.email)
             is_verified = bcrypt.checkpw(user_info.pw.encode("utf-8"), user.pw.encode("utf-8"))
             if not is_verified:
                 raise HTTPException(status_code=400, detail="NO_MATCH_USER")
@@ -118,8 +118,8 @@ def verify_token_route(credentials: HTTPAuthorizationCredentials = Depends(secur
     decoded_token = decode_access_token(token)
     return {"message": "Token is valid", "payload": decoded_token}
 
-async def is_email_exist(email: str):
-    get_email = Users.get(email=email)
+async def is_email_exist(email: str, session: AsyncSession):
+    get_email = await Users.aget(session, email=email)
     if get_email:
         return True
     return False
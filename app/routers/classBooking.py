@@ -1,15 +1,107 @@
+import csv
+import io
+import json
+from collections import Counter
 from fastapi import APIRouter, Depends, HTTPException
-from app.models import ClassBookingRegister, ClassBookingPatch, CustomResponse, MembersBase, CourseBase, ClassBookingBase
-from datetime import datetime, date
-from sqlalchemy import func, desc
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from app.models import ClassBookingRegister, ClassBookingPatch, ClassBookingSchedule, ClassBookingStatusPatch, CustomResponse, MembersBase, CourseBase, ClassBookingBase
+from datetime import datetime, date, timedelta
+from sqlalchemy import case, func, desc, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager
 from app.database.schema import ClassBooking, Course, Members
 from app.database.conn import db
+from app.database.count import count_cache
+from app.database.crud import (
+    ACTIVE_ENROLLMENT_STATUSES, booked_days_query, class_booking_where, is_duplicate_day, release_session, take_session,
+)
 from typing import Optional
 from fastapi import Query
 from app.common.consts import CLASS_TYPE, ENROLLMENT_STATUS
+from app.utils.date_utils import day_range
+from app.utils.query_utils import InvalidCursor
 router = APIRouter()
 
+# 일괄 상태 변경에서 허용하는 상태 변경 (수강준비 -> 수강완료, 수강준비 -> 수강취소)
+STATUS_TRANSITIONS = {("1", "2"), ("1", "3")}
+# 일정 생성으로 한 번에 만들 수 있는 최대 예약 수
+SCHEDULE_MAX_BOOKINGS = 366
+# 내보내기 시 DB 에서 한 번에 가져오고 응답으로 내보내는 행 수
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_COLUMNS = (
+    "id", "course_id", "reservation_date", "enrollment_status", "enrollment_status_txt",
+    "class_type", "class_type_txt", "payment_amount", "start_date", "end_date",
+    "name", "phone", "parent_phone",
+)
+
+
+def stream_class_bookings(where: list, format: str):
+    """
+    예약 목록을 EXPORT_CHUNK_SIZE 행씩 server-side cursor 로 읽어 NDJSON/CSV 조각으로 내보냄
+    ORM 객체 대신 컬럼 값만 읽고 조각 단위로 내보내므로 결과 크기와 상관없이 메모리 사용량이 일정하다.
+    요청 세션은 응답 전에 닫히므로 자체 세션을 연다.
+    """
+    query = select(
+        ClassBooking.id, ClassBooking.course_id, ClassBooking.reservation_date, ClassBooking.enrollment_status,
+        Course.class_type, Course.payment_amount, Course.start_date, Course.end_date,
+        Members.name, Members.phone, Members.parent_phone,
+    ).join(Course, ClassBooking.course_id == Course.id).join(Members, Course.members_id == Members.id).filter(
+        *where
+    ).order_by(desc(ClassBooking.id)).execution_options(stream_results=True, yield_per=EXPORT_CHUNK_SIZE)
+
+    if format == "csv":
+        yield "\ufeff" + ",".join(EXPORT_COLUMNS) + "\r\n"  # 엑셀에서 한글이 깨지지 않도록 BOM
+    with db.session_scope(auto_commit=False) as session:
+        for rows in session.execute(query).partitions():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer) if format == "csv" else None
+            for row in rows:
+                values = {
+                    "id": row.id,
+                    "course_id": row.course_id,
+                    "reservation_date": row.reservation_date.isoformat(),
+                    "enrollment_status": row.enrollment_status,
+                    "enrollment_status_txt": ENROLLMENT_STATUS.get(row.enrollment_status, "-"),
+                    "class_type": row.class_type,
+                    "class_type_txt": CLASS_TYPE.get(row.class_type, "Unknown class"),
+                    "payment_amount": row.payment_amount,
+                    "start_date": row.start_date.isoformat(),
+                    "end_date": row.end_date.isoformat(),
+                    "name": row.name,
+                    "phone": row.phone,
+                    "parent_phone": row.parent_phone,
+                }
+                if writer is not None:
+                    writer.writerow([values[column] for column in EXPORT_COLUMNS])
+                else:
+                    buffer.write(json.dumps(values, ensure_ascii=False) + "\n")
+            yield buffer.getvalue()
+
+
+@router.get("/export", status_code=200)
+def export_class_booking(
+    id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    name: Optional[str] = None,
+    class_type: Optional[str] = None,
+    enrollment_status: Optional[str] = None,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),  # ndjson (한 줄에 예약 하나) / csv
+):
+    """
+        `수강 예약 내보내기 API`\n
+         /list 와 같은 검색 조건의 예약 전체를 id 내림차순으로 스트리밍 (페이징 없이 전체가 필요할 때 /list 대신 사용)
+    """
+    where = class_booking_where(id, start_date, end_date, name, class_type, enrollment_status)
+    filename = f"class_booking_{date.today():%Y%m%d}.{format}"
+    return StreamingResponse(
+        stream_class_bookings(where, format),
+        media_type="text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/list", status_code=200, response_model=CustomResponse)
 def get_class_booking(
     id:Optional[int] = None,
@@ -21,54 +113,50 @@ def get_class_booking(
     use_pagination: bool = Query(False),  # 페이징 사용 여부
     page: int = Query(1, ge=1),  # 기본 페이지 번호는 1
     per_page: int = Query(10, ge=1, le=100),  # 페이지당 항목 수 제한 (10~100)
+    cursor: Optional[str] = None,  # 이전 응답의 next_cursor (빈 값이면 cursor 방식 첫 페이지, 주면 use_pagination/page 무시)
+    with_total: bool = Query(True),  # False 면 total_count 를 계산하지 않음
     session: Session = Depends(db.session)
 ):
     """
         `수강생 정보 API`\n
          name: 첫 글자는 무조건 동일해야함.
+         cursor: 예약일시, id 내림차순으로 다음 페이지 조회
+         페이징 없이 전체가 필요하면 /export (NDJSON/CSV 스트리밍) 사용
         :return:
     """
     try:
         try:
             # 이름으로 회원 검색
-            query = session.query(ClassBooking).filter(
-                ClassBooking.deleted_at.is_(None)  # deleted_at이 null인 경우만 필터링
-            ).join(Course).filter(
-                Course.deleted_at.is_(None),
-            ).join(Members).filter(
-                Members.deleted_at.is_(None)
+            query = session.query(ClassBooking).join(Course).join(Members).filter(
+                *class_booking_where(id, start_date, end_date, name, class_type, enrollment_status)
+            ).options(
+                # 수강/회원 정보는 이미 join 한 결과로 채움 (행마다 lazy load 하지 않음)
+                contains_eager(ClassBooking.course).contains_eager(Course.member)
             )
-            if id:
-                query = query.filter(ClassBooking.id == id)
-
-            if start_date:
-                query = query.filter(func.date(ClassBooking.reservation_date) >= start_date)
-
-            if end_date:
-                query = query.filter(func.date(ClassBooking.reservation_date) <= end_date)
-
-            if name:
-                query = query.filter(Members.name.ilike(f"%{name}%"))
-
-            if class_type:
-                query = query.filter(Course.class_type == class_type)
-
-            if enrollment_status:
-                query = query.filter(ClassBooking.enrollment_status == enrollment_status)
-
-
-            # 전체 결과 수 계산
-            total_count = query.count()
 
-            # 결과 정렬
-            query = query.order_by(desc(ClassBooking.id))
+            # 전체 결과 수 계산 (설정에 따라 exact / cached / estimated)
+            total_count, count_strategy = count_cache.count(
+                session, "class-booking", query, ("class_booking", "course", "members"),
+                dict(id=id, start_date=start_date, end_date=end_date, name=name, class_type=class_type,
+                     enrollment_status=enrollment_status),
+                with_total,
+            )
 
-            if use_pagination:
+            next_cursor = None
+            if cursor is not None:
+                # cursor 방식 (예약일시, id 내림차순)
+                keys = (ClassBooking.reservation_date, ClassBooking.id)
+                class_booking, next_cursor = ClassBooking.keyset_page(
+                    ClassBooking.keyset(query, cursor, per_page, *keys).all(), per_page, *keys
+                )
+            elif use_pagination:
+                # 결과 정렬
+                query = query.order_by(desc(ClassBooking.id))
                 # 페이징을 적용하여 쿼리 실행
                 class_booking = query.offset((page - 1) * per_page).limit(per_page).all()
             else:
                 # 페이징을 사용하지 않고 모든 결과 가져오기
-                class_booking = query.all()
+                class_booking = query.order_by(desc(ClassBooking.id)).all()
 
             users_response = [
                 {
@@ -95,10 +183,13 @@ def get_class_booking(
 
             response_data = {
                 "result": users_response,
-                "total_count": total_count
+                "total_count": total_count,
+                "count_strategy": count_strategy
             }
 
-            if use_pagination:
+            if cursor is not None:
+                response_data.update({"next_cursor": next_cursor, "per_page": per_page})
+            elif use_pagination:
                 response_data.update({"page": page, "per_page": per_page})
 
             return CustomResponse(
@@ -106,6 +197,8 @@ def get_class_booking(
                 result_msg="회원 정보 및 수강 정보 가져오기 성공",
                 response=response_data
             )
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="잘못된 cursor")
         except Exception as ve:
             raise HTTPException(status_code=404, detail="회원 정보 및 수강 정보 불러오기 실패")
     except HTTPException as e:
@@ -118,7 +211,7 @@ def get_class_booking(
 
 
 @router.post("/register", status_code=201, response_model=CustomResponse)
-async def register_class_booking(reg_info: ClassBookingRegister, session: Session = Depends(db.session)):
+async def register_class_booking(reg_info: ClassBookingRegister, session: AsyncSession = Depends(db.async_session)):
     """
         `수강 정보 입력 API`\n
         reg_info: members_id, class_type, start_date, end_date, session_count, payment_amount
@@ -128,51 +221,202 @@ async def register_class_booking(reg_info: ClassBookingRegister, session: Sessio
         if not reg_info.course_id or not reg_info.reservation_date or not reg_info.enrollment_status:
             raise HTTPException(status_code=400, detail="필수값이 없습니다.")
 
-        # 수강 목록 검색
-        course = session.query(Course).filter(
-            Course.id == reg_info.course_id,
-            Course.deleted_at.is_(None)  # deleted_at이 null인 경우만 필터링
-        ).first()
+        # 남은 수강 횟수 차감과 예약 입력을 한 트랜잭션에서 처리 (동시에 들어온 예약도 안전)
+        # - 차감은 remaining_sessions > 0 조건의 UPDATE 라서 course 행이 잠기고 횟수를 넘길 수 없음
+        # - 같은 날 중복은 (course_id, active_day) unique 키가 막음
+        if reg_info.enrollment_status in ACTIVE_ENROLLMENT_STATUSES:
+            taken = await session.execute(take_session(reg_info.course_id))
+            found = taken.rowcount > 0
+        else:
+            found = await session.scalar(select(Course.id).filter(
+                Course.id == reg_info.course_id,
+                Course.deleted_at.is_(None)
+            )) is not None
+
+        if not found:
+            # 실패한 경우에만 이유 확인
+            course = (await session.scalars(select(Course).filter(
+                Course.id == reg_info.course_id,
+                Course.deleted_at.is_(None)  # deleted_at이 null인 경우만 필터링
+            ))).first()
+            if not course:
+                raise HTTPException(status_code=404, detail="존재하지 않는 수강 id")
+            raise HTTPException(status_code=409, detail=f"완료 된 수강횟수(완료 수강 횟수: {course.session_count - course.remaining_sessions})")
 
+        new_class_booking = ClassBooking(
+            course_id=reg_info.course_id,
+            reservation_date=reg_info.reservation_date.replace(second=0, microsecond=0, tzinfo=None),
+            enrollment_status=reg_info.enrollment_status
+        )
+        session.add(new_class_booking)
+        try:
+            await session.flush()
+        except IntegrityError as e:
+            # 차감한 수강 횟수도 함께 되돌림
+            await session.rollback()
+            if is_duplicate_day(e):
+                raise HTTPException(status_code=409, detail="중복 된 수강 날짜")
+            raise
+        await session.commit()
+        count_cache.invalidate("class_booking")
+
+        return CustomResponse(
+            result="success",
+            result_msg="수강 정보 입력 성공",
+            response={"result": "True"}
+        )
+
+    except HTTPException as e:
+        return CustomResponse(
+            result="fail",
+            result_msg=str(e.detail),
+            response={"status_code": e.status_code}
+        )
+
+def schedule_dates(schedule: ClassBookingSchedule) -> list:
+    """
+    반복 일정의 수업 일시 목록 (start_date ~ end_date 중 weekdays 요일, skip_dates 제외)
+    """
+    weekdays = set(schedule.weekdays)
+    skip_dates = set(schedule.skip_dates)
+    dates = []
+    day = schedule.start_date
+    while day <= schedule.end_date:
+        if day.weekday() in weekdays and day not in skip_dates:
+            dates.append(datetime.combine(day, schedule.time.replace(second=0, microsecond=0)))
+        day += timedelta(days=1)
+    return dates
+
+
+@router.post("/schedule", status_code=201, response_model=CustomResponse)
+async def schedule_class_booking(schedule: ClassBookingSchedule, session: AsyncSession = Depends(db.async_session)):
+    """
+        `반복 일정 예약 생성 API`\n
+        schedule: course_id, weekdays (0: 월 ~ 6: 일), time, start_date, end_date, skip_dates, enrollment_status
+        기존 예약과 남은 수강 횟수를 한 번에 확인하고 전체 일정을 한 트랜잭션에서 입력 (하나라도 안 되면 전부 취소)
+        :return:
+    """
+    try:
+        if not schedule.weekdays or any(weekday not in range(7) for weekday in schedule.weekdays):
+            raise HTTPException(status_code=400, detail="요일은 0(월) ~ 6(일) 입니다.")
+        if schedule.start_date > schedule.end_date:
+            raise HTTPException(status_code=400, detail="시작일이 종료일보다 늦습니다.")
+        if schedule.enrollment_status not in ENROLLMENT_STATUS:
+            raise HTTPException(status_code=400, detail="잘못된 수강 상태")
+
+        dates = schedule_dates(schedule)
+        if not dates:
+            raise HTTPException(status_code=400, detail="일정에 해당하는 날짜가 없습니다.")
+        if len(dates) > SCHEDULE_MAX_BOOKINGS:
+            raise HTTPException(status_code=400, detail=f"한 번에 최대 {SCHEDULE_MAX_BOOKINGS}건까지 생성할 수 있습니다.")
+
+        course = (await session.scalars(select(Course).filter(
+            Course.id == schedule.course_id,
+            Course.deleted_at.is_(None)  # deleted_at이 null인 경우만 필터링
+        ))).first()
         if not course:
             raise HTTPException(status_code=404, detail="존재하지 않는 수강 id")
 
-        #수강 횟수 확인
-        count_class_booking = session.query(func.count(ClassBooking.id)).filter(
-            ClassBooking.course_id == reg_info.course_id,
-            ClassBooking.enrollment_status != "3",
-            ClassBooking.deleted_at.is_(None)
-        ).scalar()
+        # 기간 안의 기존 예약과 겹치는 날짜 (조회 1번)
+        booked_days = {reservation_date.date() for reservation_date in await session.scalars(
+            booked_days_query(schedule.course_id, schedule.start_date, schedule.end_date)
+        )}
+        duplicates = sorted(booked_days & {reservation_date.date() for reservation_date in dates})
+        if duplicates:
+            raise HTTPException(status_code=409, detail=f"중복 된 수강 날짜: {', '.join(map(str, duplicates))}")
 
-        session_count = course.session_count
+        # 남은 수강 횟수를 일정 수만큼 한 번에 차감 (부족하면 실패)
+        if schedule.enrollment_status in ACTIVE_ENROLLMENT_STATUSES:
+            taken = await session.execute(take_session(schedule.course_id, len(dates)))
+            if taken.rowcount == 0:
+                raise HTTPException(status_code=409, detail=f"남은 수강 횟수 부족 (남은 횟수: {course.remaining_sessions}, 일정: {len(dates)})")
 
-        if session_count <= count_class_booking:
-            raise HTTPException(status_code=403, detail=f"완료 된 수강횟수(완료 수강 횟수: {count_class_booking})")
-
-        # 중복 수강 안되도록 확인
-        count_class_booking_duplication = session.query(func.count(ClassBooking.id)).filter(
-            ClassBooking.course_id == reg_info.course_id,
-            func.date(ClassBooking.reservation_date) == reg_info.reservation_date.strftime(
-                '%Y-%m-%d'),
-            ClassBooking.enrollment_status != "3",
-            ClassBooking.deleted_at.is_(None)
-        ).scalar()
+        try:
+            await ClassBooking.abulk_create(session, [{
+                "course_id": schedule.course_id,
+                "reservation_date": reservation_date,
+                "enrollment_status": schedule.enrollment_status,
+            } for reservation_date in dates])
+        except IntegrityError as e:
+            # 확인 후 다른 요청이 같은 날 예약한 경우 - 차감한 수강 횟수도 함께 되돌림
+            await session.rollback()
+            if is_duplicate_day(e):
+                raise HTTPException(status_code=409, detail="중복 된 수강 날짜")
+            raise
+        await session.commit()
+        count_cache.invalidate("class_booking")
 
-        if count_class_booking_duplication >= 1:
-            raise HTTPException(status_code=403, detail=f"중복 된 수강 날짜")
+        return CustomResponse(
+            result="success",
+            result_msg="수강 일정 입력 성공",
+            response={"result": "True", "count": len(dates), "reservation_dates": dates}
+        )
 
-        new_class_booking = ClassBooking(
-            course_id=reg_info.course_id,
-            reservation_date=reg_info.reservation_date.strftime('%Y-%m-%d %H:%M:00'),
-            enrollment_status=reg_info.enrollment_status
+    except HTTPException as e:
+        return CustomResponse(
+            result="fail",
+            result_msg=str(e.detail),
+            response={"status_code": e.status_code}
         )
-        session.add(new_class_booking)
-        session.commit()
+
+
+@router.patch("/status", status_code=200, response_model=CustomResponse)
+async def patch_class_booking_status(reg_info: ClassBookingStatusPatch, session: AsyncSession = Depends(db.async_session)):
+    """
+        `수강 상태 일괄 변경 API`\n
+        reg_info: ids 또는 reservation_date / class_type / course_id, from_status, to_status (1 -> 2, 1 -> 3)
+        대상 예약을 잠그고 UPDATE 한 번으로 상태를 바꾼 뒤, 취소된 만큼 수강별 남은 수강 횟수를 UPDATE 한 번으로 반환
+        :return: 변경된 예약 id 목록
+    """
+    try:
+        if (reg_info.from_status, reg_info.to_status) not in STATUS_TRANSITIONS:
+            raise HTTPException(status_code=400, detail="변경할 수 없는 수강 상태")
+        if not reg_info.ids and not reg_info.reservation_date and not reg_info.course_id:
+            raise HTTPException(status_code=400, detail="ids, reservation_date, course_id 중 하나는 필수입니다.")
+
+        where = [
+            ClassBooking.enrollment_status == reg_info.from_status,
+            ClassBooking.deleted_at.is_(None),
+            Course.deleted_at.is_(None),
+        ]
+        if reg_info.ids:
+            where.append(ClassBooking.id.in_(reg_info.ids))
+        if reg_info.reservation_date:
+            day_start, day_end = day_range(reg_info.reservation_date)
+            where += [ClassBooking.reservation_date >= day_start, ClassBooking.reservation_date < day_end]
+        if reg_info.class_type:
+            where.append(Course.class_type == reg_info.class_type)
+        if reg_info.course_id:
+            where.append(ClassBooking.course_id == reg_info.course_id)
+
+        # 대상 예약 잠금 + 변경될 행 목록 (MySQL UPDATE 에는 RETURNING 이 없음)
+        targets = (await session.execute(select(ClassBooking.id, ClassBooking.course_id).join(
+            Course, ClassBooking.course_id == Course.id
+        ).filter(*where).with_for_update())).all()
+
+        if targets:
+            ids = [target.id for target in targets]
+            await session.execute(
+                update(ClassBooking).where(ClassBooking.id.in_(ids)).values(enrollment_status=reg_info.to_status),
+                execution_options={"synchronize_session": False},
+            )
+            if reg_info.to_status not in ACTIVE_ENROLLMENT_STATUSES:
+                # 취소된 예약 수만큼 수강별 남은 수강 횟수 반환
+                released = Counter(target.course_id for target in targets)
+                await session.execute(
+                    update(Course).where(Course.id.in_(list(released))).values(
+                        remaining_sessions=Course.remaining_sessions + case(released, value=Course.id)
+                    ),
+                    execution_options={"synchronize_session": False},
+                )
+        await session.commit()
+        if targets:
+            count_cache.invalidate("class_booking")
 
         return CustomResponse(
             result="success",
-            result_msg="수강 정보 입력 성공",
-            response={"result": "True"}
+            result_msg="수강 상태 변경 성공",
+            response={"result": "True", "count": len(targets), "ids": [target.id for target in targets]}
         )
 
     except HTTPException as e:
@@ -182,6 +426,7 @@ async def register_class_booking(reg_info: ClassBookingRegister, session: Sessio
             response={"status_code": e.status_code}
         )
 
+
 @router.patch("/{id}", status_code=200, response_model=CustomResponse)
 def patch_class_booking(id: int, reg_info: ClassBookingPatch, session: Session = Depends(db.session)):
     """
@@ -202,13 +447,31 @@ def patch_class_booking(id: int, reg_info: ClassBookingPatch, session: Session =
         if not classBooking:
             raise HTTPException(status_code=404, detail="존재하지 않는 수강 id")
 
-        if reg_info.reservation_date:
-            classBooking.reservation_date = reg_info.reservation_date
-
         if reg_info.enrollment_status:
+            # 취소 <-> 수강준비/수강완료 로 바뀌면 남은 수강 횟수도 같은 트랜잭션에서 갱신
+            # (거절되면 아무것도 바꾸지 않도록 다른 값보다 먼저 확인)
+            was_active = classBooking.enrollment_status in ACTIVE_ENROLLMENT_STATUSES
+            is_active = reg_info.enrollment_status in ACTIVE_ENROLLMENT_STATUSES
+            if was_active and not is_active:
+                session.execute(release_session(classBooking.course_id))
+            elif is_active and not was_active:
+                if session.execute(take_session(classBooking.course_id)).rowcount == 0:
+                    session.rollback()
+                    raise HTTPException(status_code=409, detail="완료 된 수강횟수")
             classBooking.enrollment_status = reg_info.enrollment_status
 
+        if reg_info.reservation_date:
+            classBooking.reservation_date = reg_info.reservation_date
+
+        try:
+            session.flush()
+        except IntegrityError as e:
+            session.rollback()
+            if is_duplicate_day(e):
+                raise HTTPException(status_code=409, detail="중복 된 수강 날짜")
+            raise
         session.commit()
+        count_cache.invalidate("class_booking")
 
         # 삭제된 회원 정보를 반환하지 않음
         return CustomResponse(
@@ -245,7 +508,10 @@ def del_class_booking(id: int, session: Session = Depends(db.session)):
             raise HTTPException(status_code=404, detail="존재하지 않는 수강 id")
 
         classBooking.deleted_at = datetime.now()
+        if classBooking.enrollment_status in ACTIVE_ENROLLMENT_STATUSES:
+            session.execute(release_session(classBooking.course_id))
         session.commit()
+        count_cache.invalidate("class_booking")
 
         # 삭제된 회원 정보를 반환하지 않음
         return CustomResponse(
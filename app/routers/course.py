@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from app.database.conn import db
-from app.database.schema import Members, Course, ClassBooking
+from app.database.count import count_cache
+from app.database.crud import course_bookings_where, course_list_query, course_remaining_query
+from app.database.schema import Members, Course
 from app.models import CustomResponse, CourseRegister, CoursePatch, CourseBase
-from sqlalchemy import func, and_, or_, desc
-from sqlalchemy.orm import aliased
+from sqlalchemy import func, desc, select
 from app.common.consts import CLASS_TYPE
+from app.utils.query_utils import InvalidCursor
 from fastapi import Query
 
 router = APIRouter()
@@ -25,53 +28,32 @@ async def get_course(
         end_date: Optional[datetime] = None,
         page: int = Query(1, ge=1),  # 기본 페이지 번호는 1
         per_page: int = Query(10, ge=1, le=100),  # 페이지당 항목 수 제한 (10~100)
-        session: Session = Depends(db.session)
+        cursor: Optional[str] = None,  # 이전 응답의 next_cursor (빈 값이면 cursor 방식 첫 페이지, 주면 page 무시)
+        with_total: bool = Query(True),  # False 면 total_count 를 계산하지 않음
+        session: AsyncSession = Depends(db.async_session)
 ):
     try:
-        course_alias = aliased(Course)
-        members_alias = aliased(Members)
-
-        course_where = []
-        members_where = []
-
-        if id:
-            course_where.append(course_alias.id == id)
-        if name:
-            members_where.append(members_alias.name.ilike(f"%{name}%"))
-        if phone:
-            members_where.append(members_alias.phone == phone)
-        if parent_phone:
-            members_where.append(members_alias.parent_phone == parent_phone)
-        if class_type:
-            course_where.append(course_alias.class_type == class_type)
-        if start_date and end_date:
-            course_where.append(
-                or_(
-                    and_(course_alias.start_date >= start_date, course_alias.start_date <= end_date),
-                    and_(course_alias.end_date >= start_date, course_alias.end_date <= end_date),
-                    and_(course_alias.start_date <= start_date, course_alias.end_date >= end_date)
-                )
-            )
-        else:
-            if start_date:
-                course_where.append(course_alias.start_date >= start_date)
-            if end_date:
-                course_where.append(course_alias.end_date <= end_date)
-
         # 수강정보 검색
-        query = session.query(course_alias).filter(
-            course_alias.deleted_at.is_(None),  # deleted_at이 null인 경우만 필터링
-            *course_where
-        ).join(members_alias).filter(
-            members_alias.deleted_at.is_(None),
-            *members_where
+        query, course_alias = course_list_query(id, name, phone, parent_phone, class_type, start_date, end_date)
+
+        # 전체 결과 수 계산 (설정에 따라 exact / cached / estimated)
+        total_count, count_strategy = await count_cache.acount(
+            session, "course", query, ("course", "members"),
+            dict(id=id, name=name, phone=phone, parent_phone=parent_phone, class_type=class_type,
+                 start_date=start_date, end_date=end_date),
+            with_total,
         )
-
-        # 페이징 적용
-        total_count = query.count()  # 전체 결과 수 계산
-        # 결과 정렬
-        query = query.order_by(desc(course_alias.id))
-        courses = query.offset((page - 1) * per_page).limit(per_page).all()
+        # 예약 정보는 페이지의 수강 id 로 한 번에 (IN) 가져옴
+        query = query.options(selectinload(course_alias.class_bookings.and_(*course_bookings_where())))
+        next_cursor = None
+        if cursor is None:
+            # 결과 정렬
+            query = query.order_by(desc(course_alias.id))
+            courses = (await session.scalars(query.offset((page - 1) * per_page).limit(per_page))).all()
+        else:
+            # cursor 방식 (id 내림차순)
+            courses = (await session.scalars(Course.keyset(query, cursor, per_page, course_alias.id))).all()
+            courses, next_cursor = Course.keyset_page(courses, per_page, course_alias.id)
 
         course_infos = []
         for course in courses:
@@ -92,29 +74,32 @@ async def get_course(
                     "institution_name": course.member.institution_name,
                     "birth_day": course.member.birth_day,
                 },
-                "class_booking": []  # 클래스 예약 정보를 저장할 빈 리스트
+                # 클래스 예약 정보 (deleted_at 이 null 인 예약만 로드됨)
+                "class_booking": [
+                    {
+                        "id": class_booking.id,
+                        "reservation_date": class_booking.reservation_date,
+                        "enrollment_status": class_booking.enrollment_status
+                    } for class_booking in sorted(course.class_bookings, key=lambda cb: cb.id)
+                ]
             }
-
-            # 해당 코스의 클래스 예약 정보 가져오기
-            class_bookings = session.query(ClassBooking).filter(
-                ClassBooking.course_id == course.id,
-                ClassBooking.deleted_at.is_(None)  # deleted_at이 null인 경우만 필터링
-            ).all()
-
-            for class_booking in class_bookings:
-                class_booking_info = {
-                    "id": class_booking.id,
-                    "reservation_date": class_booking.reservation_date,
-                    "enrollment_status": class_booking.enrollment_status
-                }
-                course_info["class_booking"].append(class_booking_info)
-
             course_infos.append(course_info)
 
+        response_data = {"result": course_infos, "total_count": total_count, "count_strategy": count_strategy}
+        if cursor is not None:
+            response_data.update({"next_cursor": next_cursor, "per_page": per_page})
+
         return CustomResponse(
             result="success",
             result_msg="수강 정보 가져오기 성공",
-            response={"result": course_infos, "total_count": total_count}
+            response=response_data
+        )
+    except InvalidCursor:
+        # members / class-booking 목록과 같은 실패 응답
+        return CustomResponse(
+            result="fail",
+            result_msg="잘못된 cursor",
+            response={"status_code": 400}
         )
     except Exception as ve:
         raise HTTPException(status_code=404, detail="수강 정보 불러오기 실패")
@@ -132,57 +117,12 @@ async def get_course(
         id: Optional[int] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        session: Session = Depends(db.session)
+        session: AsyncSession = Depends(db.async_session)
 ):
     try:
-        course_alias = aliased(Course)
-        members_alias = aliased(Members)
-        class_booking_alias = aliased(ClassBooking)
-
-        course_where = []
-
-        if id:
-            course_where.append(course_alias.id == id)
-
-        if start_date and end_date:
-            course_where.append(
-                or_(
-                    and_(course_alias.start_date >= start_date, course_alias.start_date <= end_date),
-                    and_(course_alias.end_date >= start_date, course_alias.end_date <= end_date),
-                    and_(course_alias.start_date <= start_date, course_alias.end_date >= end_date)
-                )
-            )
-        else:
-            if start_date:
-                course_where.append(course_alias.start_date >= start_date)
-            if end_date:
-                course_where.append(course_alias.end_date <= end_date)
-
-        # 수강정보 검색
-        subq = session.query(
-            class_booking_alias.course_id,
-            func.count(class_booking_alias.course_id).label("use_num")
-        ).filter(
-            class_booking_alias.enrollment_status.in_([1, 2]),
-            class_booking_alias.deleted_at.is_(None)
-        ).group_by(
-            class_booking_alias.course_id
-        ).subquery()
-
-        query = session.query(course_alias).filter(
-            course_alias.deleted_at.is_(None),
-            *course_where
-        ).join(
-            members_alias,
-            course_alias.members_id == members_alias.id
-        ).outerjoin(
-            subq,
-            course_alias.id == subq.c.course_id
-        ).filter(
-            or_(course_alias.session_count > subq.c.use_num, subq.c.use_num.is_(None))
-        )
-
-        courses = query.all()
+        # 수강정보 검색 (남은 수강 횟수는 course.remaining_sessions 인덱스로 범위 검색)
+        query = course_remaining_query(id, start_date, end_date)
+        courses = (await session.scalars(query)).all()
 
         course_infos = []
         for course in courses:
@@ -192,6 +132,7 @@ async def get_course(
                 "start_date": course.start_date,
                 "end_date": course.end_date,
                 "session_count": course.session_count,
+                "remaining_sessions": course.remaining_sessions,
                 "payment_amount": course.payment_amount,
                 "payment_date": course.created_at,
                 "class_type": course.class_type,
@@ -223,7 +164,7 @@ async def get_course(
 
 
 @router.post("/register", status_code=201, response_model=CustomResponse)
-async def register_course(reg_info: CourseRegister, session: Session = Depends(db.session)):
+async def register_course(reg_info: CourseRegister, session: AsyncSession = Depends(db.async_session)):
     """
         `수강 정보 입력 API`\n
         reg_info: members_id, class_type, start_date, end_date, session_count, payment_amount
@@ -234,10 +175,10 @@ async def register_course(reg_info: CourseRegister, session: Session = Depends(d
             raise HTTPException(status_code=400, detail="필수값이 없습니다.")
 
         # 이름으로 회원 검색
-        member = session.query(Members).filter(
+        member = (await session.scalars(select(Members).filter(
             Members.id == reg_info.members_id,
             Members.deleted_at.is_(None)  # deleted_at이 null인 경우만 필터링
-        ).first()
+        ))).first()
 
         if not member:
             raise HTTPException(status_code=404, detail="존재하지 않는 수강생 id")
@@ -248,12 +189,13 @@ async def register_course(reg_info: CourseRegister, session: Session = Depends(d
             start_date=reg_info.start_date,
             end_date=reg_info.end_date,
             session_count=reg_info.session_count,
+            remaining_sessions=reg_info.session_count,
             payment_date=reg_info.payment_date,
             payment_amount=reg_info.payment_amount
         )
         session.add(new_course)
-        session.commit()
-        session.refresh(new_course)
+        await session.commit()
+        count_cache.invalidate("course")
 
         return CustomResponse(
             result="success",
@@ -298,6 +240,8 @@ def patch_course(id: int, reg_info: CoursePatch, session: Session = Depends(db.s
             course.end_date = reg_info.end_date
 
         if reg_info.session_count:
+            # 늘거나 줄어든 만큼 남은 수강 횟수도 조정
+            course.remaining_sessions = Course.remaining_sessions + (reg_info.session_count - course.session_count)
             course.session_count = reg_info.session_count
 
         if reg_info.payment_date:
@@ -307,6 +251,7 @@ def patch_course(id: int, reg_info: CoursePatch, session: Session = Depends(db.s
             course.payment_amount = reg_info.payment_amount
 
         session.commit()
+        count_cache.invalidate("course")
 
         # 삭제된 회원 정보를 반환하지 않음
         return CustomResponse(
@@ -344,6 +289,7 @@ def del_course(id: int, session: Session = Depends(db.session)):
 
         course.deleted_at = datetime.now()
         session.commit()
+        count_cache.invalidate("course")
 
         # 삭제된 회원 정보를 반환하지 않음
         return CustomResponse(
@@ -1,127 +1,411 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import JSONResponse
-import pickle
-import face_recognition
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+
 import numpy as np
-import cv2
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.config import conf
+from app.common.consts import FACE_MATCH_TOLERANCE, FACE_UNKNOWN_NAME, FACE_DETECTION_PROFILES
+from app.database.conn import db
+from app.database.schema import Members
+from app.face import worker
+from app.face.ann import IVFIndex
+from app.face.attendance import attendance_buffer
+from app.face.cache import RecognitionCache
+from app.face.compact import CompactGallery
+from app.face.gallery import FaceGallery
+from app.face.pool import face_pool
+from app.face.store import FaceStore
+from app.face.tracker import FaceTracker
 
 router = APIRouter()
+c = conf()
 
-# 얼굴 인식을 위한 변수 초기화
-known_face_encodings = []
-known_face_names = []
+# 얼굴 데이터 저장소 (memory-map 인코딩 파일 + 이름 사이드카, 모든 워커가 같은 파일을 공유)
+face_store = FaceStore(c.FACE_STORE_PATH)
 
-# 미리 저장된 얼굴 데이터 파일 경로
-known_faces_file = "known_faces.dat"
+# 얼굴 인식을 위한 갤러리 (저장소 인코딩 파일의 memory-map + 이름 배열, 첫 사용 시 로드)
+known_faces = None
 
+# 같은(또는 거의 같은) 이미지의 인식 결과 캐시
+recognition_cache = RecognitionCache(max_bytes=c.FACE_CACHE_MAX_BYTES, ttl=c.FACE_CACHE_TTL)
 
-# 저장된 얼굴 데이터를 로드하는 함수
-def load_known_faces():
-    global known_face_encodings, known_face_names
-    try:
-        with open(known_faces_file, "rb") as f:
-            known_face_encodings, known_face_names = pickle.load(f)
-    except FileNotFoundError:
-        # 파일이 없는 경우 초기화
-        known_face_encodings = []
-        known_face_names = []
 
+# 저장소 인코딩 파일을 복사 없이 memory-map 해서 갤러리 구성
+# prototype/양자화 설정이면 줄인 스캔 행렬을 따로 만들고 memory-map 은 re-rank 에만 사용
+def build_gallery():
+    gallery = FaceGallery.from_matrix(face_store.mmap(), face_store.names())
+    if c.FACE_GALLERY_MODE != "full" or c.FACE_GALLERY_DTYPE != "float32":
+        return CompactGallery(
+            gallery,
+            mode=c.FACE_GALLERY_MODE,
+            dtype=c.FACE_GALLERY_DTYPE,
+            max_exemplars=c.FACE_GALLERY_EXEMPLARS,
+            rerank=c.FACE_GALLERY_RERANK,
+        )
+    if c.FACE_ANN_ENABLED:
+        gallery.enable_ann(IVFIndex(nlist=c.FACE_ANN_NLIST, nprobe=c.FACE_ANN_NPROBE, min_train_size=c.FACE_ANN_MIN_SIZE))
+    return gallery
 
-# 초기에 얼굴 데이터 로드
-load_known_faces()
 
-
-# 얼굴 데이터를 파일로 저장하는 함수
-def save_known_faces():
-    with open(known_faces_file, "wb") as f:
-        pickle.dump((known_face_encodings, known_face_names), f)
-
-
-# 얼굴 데이터 추가 함수
-def add_face_encoding(face_encoding, name):
-    known_face_encodings.append(face_encoding)
-    known_face_names.append(name)
-    save_known_faces()
-
-# 두 얼굴 인코딩 간의 거리를 백분율로 계산하는 함수
-def calculate_similarity_percent(face_encoding1, face_encoding2):
-    distance = face_recognition.face_distance([face_encoding1], face_encoding2)
-    similarity_percent = (1 - distance[0]) * 100
-    return similarity_percent
+# 저장된 얼굴 데이터를 로드하는 함수
+def load_known_faces():
+    global known_faces
+    # 기존 pickle 파일(known_faces.dat)은 처음 한 번만 저장소로 이전
+    face_store.open(legacy_pickle_path=c.FACE_LEGACY_PICKLE_PATH)
+    known_faces = build_gallery()
+
+
+# 다른 워커(또는 이 워커)의 등록/삭제 반영 (처음 호출 시 저장소 로드)
+# generation 이 바뀐 경우에만 저장소를 다시 읽고, 레코드가 추가된 것뿐이면 추가된 행만 반영
+def sync_gallery():
+    global known_faces
+    if known_faces is None:
+        load_known_faces()
+        return known_faces
+    if face_store.generation() == face_store.synced_generation:
+        return known_faces
+    if face_store.refresh():
+        known_faces = build_gallery()
+    else:
+        known_faces.remap(face_store.mmap(), face_store.names())
+    recognition_cache.invalidate_matches()
+    return known_faces
+
+
+# 저장소 쓰기(파일 잠금, fsync, 삭제 시 파일 전체 compaction)는 스레드 풀에서 실행하고
+# 갤러리 반영(sync_gallery)은 이벤트 루프에서만 해서 known_faces 를 한 곳에서만 바꿈
+
+# 얼굴 데이터 추가 함수 (저장소 끝에 덧붙이기만 함)
+async def add_face_encodings(face_encodings, name, members_id=None):
+    sync_gallery()  # 서버 시작 후 첫 요청이면 저장소를 먼저 엶
+    await run_in_threadpool(face_store.append, face_encodings, [name] * len(face_encodings), members_id=members_id)
+    sync_gallery()
+
+
+# 회원 존재 여부 확인 (얼굴과 회원 연결 시)
+async def check_member(session: AsyncSession, members_id: int):
+    member = await session.scalar(select(Members.id).filter(Members.id == members_id, Members.deleted_at.is_(None)))
+    if member is None:
+        raise HTTPException(status_code=404, detail=f"Member {members_id} not found")
+
+
+# 얼굴 데이터 삭제 함수 (삭제 표시 후 compaction)
+async def remove_face_encodings(name):
+    sync_gallery()
+    deleted = await run_in_threadpool(face_store.delete_name, name)
+    sync_gallery()
+    return deleted
+
+
+# 얼굴 인코딩 간의 거리를 백분율로 계산하는 함수
+def calculate_similarity_percent(distance):
+    return float((1 - distance) * 100)
+
+
+# 검출 프로파일 조회 (지정하지 않으면 설정의 기본 프로파일)
+def get_detection_profile(profile: Optional[str] = None):
+    profile = profile or c.FACE_DETECTION_PROFILE
+    if profile not in FACE_DETECTION_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown detection profile '{profile}'")
+    return profile, FACE_DETECTION_PROFILES[profile]
+
+
+# 캐시 항목 크기 추정 (인코딩 + 얼굴별 위치/매칭 결과 여유분)
+def cache_entry_size(result):
+    return 256 + result["encodings"].nbytes + 512 * len(result["locations"])
+
+
+# 검출/인코딩 결과를 캐시 항목으로 저장 (첫 키가 대표 키, 나머지 키는 같은 항목을 가리킴)
+def cache_detection(keys, result):
+    entry = {"detection": result, "generation": recognition_cache.generation, "matches": {}}
+    recognition_cache.put(keys[0], entry, cache_entry_size(result), aliases=keys[1:])
+    return entry
+
+
+# 캐시를 거쳐 검출/인코딩 (캐시에 없으면 프로세스 풀에서 실행)
+async def detect_faces_cached(face_img, profile_name, detection_profile):
+    keys = [recognition_cache.key(face_img, profile_name)]
+    entry = recognition_cache.get(keys[0])
+    if entry is None and recognition_cache.enabled and c.FACE_CACHE_PERCEPTUAL:
+        # 다시 인코딩된 JPEG 등 바이트는 달라도 같은 이미지인 경우
+        phash = await face_pool.run(worker.perceptual_hash, face_img)
+        keys.append(recognition_cache.perceptual_key(phash, profile_name))
+        entry = recognition_cache.get(keys[1])
+    if entry is None:
+        result = await face_pool.run(worker.detect_and_encode, face_img, detection_profile)
+        entry = cache_detection(keys, result)
+    return entry
+
+
+# 캐시 항목의 매칭 결과 (갤러리가 바뀌었으면 다시 계산)
+def match_cached(entry, top_k: int = 1):
+    sync_gallery()
+    if entry["generation"] != recognition_cache.generation:
+        entry["generation"] = recognition_cache.generation
+        entry["matches"] = {}
+    if top_k not in entry["matches"]:
+        result = entry["detection"]
+        entry["matches"][top_k] = match_faces(result["encodings"], top_k=top_k, face_locations=result["locations"])
+    return entry["matches"][top_k]
+
+
+# 인코딩들을 갤러리와 한 번에 비교하여 이름 추론
+def match_faces(face_encodings, top_k: int = 1, face_locations=None):
+    recognized_faces = []
+    if len(face_encodings) == 0:
+        return recognized_faces
+
+    gallery = sync_gallery()
+    indices, distances = gallery.search_batch(face_encodings, k=top_k)
+    for n, (face_indices, face_distances) in enumerate(zip(indices, distances)):
+        if len(face_indices) and face_distances[0] <= FACE_MATCH_TOLERANCE:
+            recognized_face = {
+                "name": gallery.names[face_indices[0]],
+                "similarity_percent": calculate_similarity_percent(face_distances[0]),
+            }
+        else:
+            recognized_face = {"name": FACE_UNKNOWN_NAME, "similarity_percent": 0.0}  # 일치하는 얼굴이 없을 경우
+
+        if face_locations is not None:
+            top, right, bottom, left = face_locations[n]
+            recognized_face["location"] = {"top": top, "right": right, "bottom": bottom, "left": left}
+        if top_k > 1:
+            recognized_face["candidates"] = [
+                {"name": gallery.names[i], "distance": float(d)} for i, d in zip(face_indices, face_distances)
+            ]
+        recognized_faces.append(recognized_face)
+    return recognized_faces
 
 
 # 얼굴 데이터 추가 API 엔드포인트
 @router.post("/add_face/")
-async def add_face(name: str, request: UploadFile = File(...)):
+async def add_face(
+        name: str,
+        request: UploadFile = File(...),
+        profile: Optional[str] = None,
+        members_id: Optional[int] = None,
+        session: AsyncSession = Depends(db.async_session),
+):
+    _, detection_profile = get_detection_profile(profile)
+    if members_id is not None:
+        await check_member(session, members_id)
     try:
         face_img = await request.read()  # UploadFile에서 바로 데이터를 읽음
 
-        # OpenCV를 이용하여 이미지 디코딩
-        image_array = np.asarray(bytearray(face_img), dtype=np.uint8)
-        frame = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
+        # 디코딩, 얼굴 위치 찾기, 인코딩은 프로세스 풀에서 실행
+        result = await face_pool.run(worker.detect_and_encode, face_img, detection_profile)
 
-        if frame is None:
-            raise HTTPException(status_code=400, detail="Could not decode image")
+        # 각 얼굴 인코딩과 이름 추가
+        if len(result["encodings"]):
+            await add_face_encodings(result["encodings"], name, members_id)
 
-        # 얼굴 인식을 위해 RGB로 변환
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return JSONResponse(content={"message": f"Added face '{name}' successfully."})
 
-        # 얼굴 위치 찾기
-        face_locations = face_recognition.face_locations(rgb_frame)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # 각 얼굴 인코딩과 이름 추가
-        for face_location in face_locations:
-            top, right, bottom, left = face_location
-            face_encoding = face_recognition.face_encodings(rgb_frame, [face_location])[0]
-            add_face_encoding(face_encoding, name)
 
-        return JSONResponse(content={"message": f"Added face '{name}' successfully."})
+# 등록된 얼굴과 회원 연결 API 엔드포인트 (체크인 출석 기록용)
+@router.post("/link_member/")
+async def link_member(name: str, members_id: int, session: AsyncSession = Depends(db.async_session)):
+    sync_gallery()
+    if name not in face_store.names():
+        raise HTTPException(status_code=404, detail=f"Face '{name}' not found")
+    await check_member(session, members_id)
+
+    await run_in_threadpool(face_store.link_member, name, members_id)
+    sync_gallery()
+    return JSONResponse(content={"message": f"Linked face '{name}' to member {members_id}."})
+
+
+# 얼굴 데이터 삭제 API 엔드포인트
+@router.delete("/delete_face/")
+async def delete_face(name: str):
+    try:
+        deleted = await remove_face_encodings(name)
+        if not deleted:
+            raise HTTPException(status_code=404, detail=f"Face '{name}' not found")
 
+        return JSONResponse(content={"message": f"Deleted face '{name}' successfully.", "deleted": deleted})
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 # 얼굴 인식 API 엔드포인트
 @router.post("/recognize_face/")
-async def recognize_face(request: UploadFile = File(...)):
+async def recognize_face(
+        request: UploadFile = File(...),
+        top_k: int = Query(1, ge=1, le=10),
+        profile: Optional[str] = None,
+):
+    profile_name, detection_profile = get_detection_profile(profile)
     try:
         face_img = await request.read()  # UploadFile에서 바로 데이터를 읽음
 
-        # OpenCV를 이용하여 이미지 디코딩
-        image_array = np.asarray(bytearray(face_img), dtype=np.uint8)
-        frame = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
+        # 디코딩, 얼굴 위치 찾기, 인코딩은 프로세스 풀에서 실행 (캐시에 있으면 생략)
+        entry = await detect_faces_cached(face_img, profile_name, detection_profile)
 
-        if frame is None:
-            raise HTTPException(status_code=400, detail="Could not decode image")
+        # 각 얼굴 인코딩과 기존 데이터 비교하여 이름 추론
+        recognized_faces = match_cached(entry, top_k=top_k)
 
-        # 얼굴 인식을 위해 RGB로 변환
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return JSONResponse(content={"recognized_faces": recognized_faces})
 
-        # 얼굴 위치 찾기
-        face_locations = face_recognition.face_locations(rgb_frame)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # 인식된 얼굴들의 이름 리스트
-        recognized_faces = []
 
-        # 각 얼굴 인코딩과 기존 데이터 비교하여 이름 추론
-        for face_location in face_locations:
-            top, right, bottom, left = face_location
-            face_encoding = face_recognition.face_encodings(rgb_frame, [face_location])[0]
-
-            matches = face_recognition.compare_faces(known_face_encodings, face_encoding)
-            name = "인식못함"
-
-            # 거리 계산 후 가장 가까운 얼굴 선택
-            face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-            best_match_index = np.argmin(face_distances)
-            if matches[best_match_index]:
-                name = known_face_names[best_match_index]
-                similarity_percent = calculate_similarity_percent(known_face_encodings[best_match_index], face_encoding)
-                recognized_faces.append({"name": name, "similarity_percent": similarity_percent})
+# 얼굴 체크인 API 엔드포인트
+# 인식된 얼굴의 회원을 출석 버퍼에 넣고 바로 응답 (출석 기록은 버퍼가 모아서 한 번에 처리)
+@router.post("/check-in/")
+async def check_in(request: UploadFile = File(...), profile: Optional[str] = None):
+    profile_name, detection_profile = get_detection_profile(profile)
+    try:
+        face_img = await request.read()
+        entry = await detect_faces_cached(face_img, profile_name, detection_profile)
+        checked_at = datetime.now()
+
+        faces = []
+        for face in match_cached(entry):
+            members_id = face_store.member_id(face["name"])
+            if face["name"] == FACE_UNKNOWN_NAME:
+                status = "unknown"
+            elif members_id is None:
+                status = "unlinked"  # 회원과 연결되지 않은 얼굴
+            elif attendance_buffer.add(members_id, checked_at):
+                status = "queued"
             else:
-                recognized_faces.append({"name": name, "similarity_percent": 0.0})  # 일치하는 얼굴이 없을 경우
+                status = "already_checked_in"
+            faces.append({**face, "members_id": members_id, "check_in": status})
 
-        return JSONResponse(content={"recognized_faces": recognized_faces})
+        return JSONResponse(content={"checked_in_faces": faces})
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+# 여러 이미지 일괄 인식 API 엔드포인트
+@router.post("/recognize_batch/")
+async def recognize_batch(
+        requests: List[UploadFile] = File(...),
+        top_k: int = Query(1, ge=1, le=10),
+        profile: Optional[str] = None,
+):
+    profile_name, detection_profile = get_detection_profile(profile)
+    try:
+        if len(requests) > c.FACE_BATCH_MAX_IMAGES:
+            raise HTTPException(status_code=400, detail=f"Too many images (max {c.FACE_BATCH_MAX_IMAGES})")
+
+        # 업로드 파일을 동시에 읽음
+        face_imgs = await asyncio.gather(*(request.read() for request in requests))
+
+        # 캐시에 없는 이미지만 워커 수만큼 묶어서 병렬로 디코딩, 검출, 인코딩
+        keys = [recognition_cache.key(face_img, profile_name) for face_img in face_imgs]
+        entries = [recognition_cache.get(key) for key in keys]
+        missing = [n for n, entry in enumerate(entries) if entry is None]
+        detected = await face_pool.map_chunks(
+            worker.detect_and_encode_batch, [face_imgs[n] for n in missing], detection_profile
+        )
+        for n, result in zip(missing, detected):
+            entries[n] = cache_detection([keys[n]], result) if "error" not in result else {"detection": result}
+        results = [entry["detection"] for entry in entries]
+
+        # 모든 이미지의 인코딩을 모아서 갤러리와 한 번에 비교
+        decoded = [result for result in results if "error" not in result]
+        encodings = [result["encodings"] for result in decoded]
+        locations = [location for result in decoded for location in result["locations"]]
+        recognized_faces = match_faces(
+            np.concatenate(encodings) if encodings else [], top_k=top_k, face_locations=locations
+        )
+
+        # 이미지별 결과로 다시 나눔
+        images = []
+        offset = 0
+        for request, result in zip(requests, results):
+            if "error" in result:
+                images.append({"filename": request.filename, "error": result["error"], "recognized_faces": []})
+                continue
+            face_count = len(result["encodings"])
+            images.append({"filename": request.filename, "recognized_faces": recognized_faces[offset:offset + face_count]})
+            offset += face_count
+
+        return JSONResponse(content={"images": images})
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# 스트리밍 프레임 한 장 처리: 추적 중인 얼굴은 인코딩 생략, 새 얼굴만 인식 후 이벤트 전송
+async def process_stream_frame(websocket: WebSocket, tracker: FaceTracker, frame: bytes, frame_no: int,
+                               detection_profile: dict):
+    try:
+        result = await face_pool.run(
+            worker.detect_and_encode_tracked,
+            frame,
+            detection_profile,
+            tracker.skip_boxes(FACE_UNKNOWN_NAME),
+            c.FACE_STREAM_IOU,
+        )
+        matched = match_faces(result["encodings"], face_locations=[result["locations"][n] for n in result["encoded"]])
+        recognized = [None] * len(result["locations"])
+        for n, face in zip(result["encoded"], matched):
+            recognized[n] = face
+
+        for event in tracker.update(result["locations"], recognized):
+            await websocket.send_json({**event, "frame": frame_no})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        await websocket.send_json({"event": "error", "frame": frame_no, "detail": str(e)})
+
+
+# 스트리밍 얼굴 인식 WebSocket 엔드포인트
+# 클라이언트는 프레임(이미지 바이트)을 계속 보내고, 서버는 인식/추적 이벤트를 보낸다.
+@router.websocket("/stream/")
+async def recognize_stream(websocket: WebSocket, profile: Optional[str] = None):
+    await websocket.accept()
+    try:
+        _, detection_profile = get_detection_profile(profile)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+
+    tracker = FaceTracker(
+        iou_threshold=c.FACE_STREAM_IOU,
+        max_missed=c.FACE_STREAM_MAX_MISSED,
+        reverify_ticks=c.FACE_STREAM_REVERIFY,
+    )
+    frame_no = 0
+    pending = None
+    try:
+        while True:
+            frame = await websocket.receive_bytes()
+            frame_no += 1
+
+            # 프레임 건너뛰기: N 프레임마다 한 장만, 이전 프레임 처리 중이면 버림
+            if (frame_no - 1) % (c.FACE_STREAM_FRAME_SKIP + 1):
+                continue
+            if pending is not None and not pending.done():
+                continue
+            pending = asyncio.create_task(
+                process_stream_frame(websocket, tracker, frame, frame_no, detection_profile)
+            )
+    except WebSocketDisconnect:
+        if pending is not None:
+            pending.cancel()
+
+
+# 인식 결과 캐시 통계 API 엔드포인트
+@router.get("/cache/stats/")
+async def get_cache_stats():
+    return JSONResponse(content=recognition_cache.stats())
@@ -1,11 +1,15 @@
-from datetime import datetime, time
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 import logging
 from sqlalchemy import desc
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from app.database.conn import db
-from app.database.schema import Members
+from app.database.count import count_cache
+from app.database.crud import members_where
+from app.database.schema import Members, Course
 from app.models import MemberRegister, MemberPatch, CustomResponse, MembersBase, CourseBase
+from app.utils.query_utils import InvalidCursor
 from typing import Optional
 from fastapi import Query
 
@@ -20,55 +24,54 @@ def get_member(
     end_date: Optional[datetime] = None,
     page: int = Query(1, ge=1),  # 기본 페이지 번호는 1
     per_page: int = Query(10, ge=1, le=100),  # 페이지당 항목 수 제한 (10~100)
+    cursor: Optional[str] = None,  # 이전 응답의 next_cursor (빈 값이면 cursor 방식 첫 페이지, 주면 page 무시)
+    with_total: bool = Query(True),  # False 면 total_count 를 계산하지 않음
     session: Session = Depends(db.session)
 ):
     try:
         try:
             # 이름으로 회원 검색
             query = session.query(Members).filter(
-                Members.deleted_at.is_(None)  # deleted_at이 null인 경우만 필터링
+                *members_where(id, name, phone, parent_phone, start_date, end_date)
             )
-            if id:
-                query = query.filter(Members.id == id)
-
-            if name:
-                query = query.filter(Members.name.ilike(f"%{name}%"))
-
-            if phone:
-                query = query.filter(Members.phone.ilike(f"%{phone}%"))
-
-            if parent_phone:
-                query = query.filter(Members.parent_phone.ilike(f"%{parent_phone}%"))
-
-            if start_date:
-                query = query.filter(Members.created_at >= start_date)
-
-            if end_date:
-                end_date = datetime.combine(end_date.date(), time.max)
-                query = query.filter(Members.created_at <= end_date)
-
-            # 페이징을 적용하여 쿼리 실행
-            total_count = query.count()
-            # 결과 정렬
-            query = query.order_by(desc(Members.id))
-            members = query.offset((page - 1) * per_page).limit(per_page).all()
+            # 수강 정보는 페이지의 회원 id 로 한 번에 (IN) 가져옴
+            query = query.options(selectinload(Members.courses.and_(Course.deleted_at.is_(None))))
+
+            # 전체 결과 수 계산 (설정에 따라 exact / cached / estimated)
+            total_count, count_strategy = count_cache.count(
+                session, "members", query, ("members",),
+                dict(id=id, name=name, phone=phone, parent_phone=parent_phone, start_date=start_date, end_date=end_date),
+                with_total,
+            )
+            next_cursor = None
+            if cursor is None:
+                # 결과 정렬
+                query = query.order_by(desc(Members.id))
+                members = query.offset((page - 1) * per_page).limit(per_page).all()
+            else:
+                # cursor 방식 (id 내림차순)
+                members, next_cursor = Members.keyset_page(Members.keyset(query, cursor, per_page).all(), per_page)
 
             # 결과를 파이썬 객체로 변환
             users_response = []
 
             for member in members:
                 member_info = MembersBase.from_orm(member)
-                member_courses = []
-                for course in member.courses:
-                    if course.deleted_at is None:  # 삭제되지 않은 수강 정보만 추가
-                        member_courses.append(CourseBase.from_orm(course))
+                # 삭제되지 않은 수강 정보만 로드됨
+                member_courses = [CourseBase.from_orm(course) for course in sorted(member.courses, key=lambda c: c.id)]
                 users_response.append({"member": member_info, "courses": member_courses})
 
+            response_data = {"result": users_response, "total_count": total_count, "count_strategy": count_strategy}
+            if cursor is not None:
+                response_data.update({"next_cursor": next_cursor, "per_page": per_page})
+
             return CustomResponse(
                 result="success",
                 result_msg="회원 정보 및 수강 정보 가져오기 성공",
-                response={"result": users_response, "total_count": total_count}
+                response=response_data
             )
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="잘못된 cursor")
         except Exception as ve:
             logging.error(f"Validation error: {ve}")
             raise HTTPException(status_code=404, detail="회원 정보 및 수강 정보 불러오기 실패")
@@ -82,7 +85,7 @@ def get_member(
         )
 
 @router.post("/register", status_code=201, response_model=CustomResponse)
-async def register(reg_info: MemberRegister, session: Session = Depends(db.session)):
+async def register(reg_info: MemberRegister, session: AsyncSession = Depends(db.async_session)):
     """
     `수강생 정보 입력 API`\n
     reg_info: name, phone, parent_phone, institution_name, birth_day
@@ -102,12 +105,12 @@ async def register(reg_info: MemberRegister, session: Session = Depends(db.sessi
                 birth_day=reg_info.birth_day
             )
             session.add(new_member)
-            session.commit()
-            session.refresh(new_member)
+            await session.commit()
+            count_cache.invalidate("members")
 
         except Exception as ve:
             logging.error(f"Validation error: {ve}")
-            session.rollback()
+            await session.rollback()
             raise HTTPException(status_code=500, detail="수강정보 저장실패")
 
         return CustomResponse(
@@ -154,6 +157,7 @@ def patch_member(id: int, reg_info: MemberPatch, session: Session = Depends(db.s
             member.birth_day = reg_info.birth_day
 
         session.commit()
+        count_cache.invalidate("members")
 
         # 삭제된 회원 정보를 반환하지 않음
         return CustomResponse(
@@ -192,6 +196,7 @@ def del_member(id: int, session: Session = Depends(db.session)):
 
         member.deleted_at = datetime.now()
         session.commit()
+        count_cache.invalidate("members")
 
         # 삭제된 회원 정보를 반환하지 않음
         return CustomResponse(
@@ -1,4 +1,5 @@
 from datetime import datetime, date, timedelta
+from typing import Tuple
 
 
 class D:
@@ -18,3 +19,11 @@ class D:
     def date_num(cls, diff: int=0) -> int:
         return int(cls.date(diff=diff).strftime('%Y%m%d'))
 
+
+
+def day_range(day: date) -> Tuple[datetime, datetime]:
+    """
+    하루 범위 [00:00, 다음날 00:00) - func.date() 대신 컬럼 그대로 비교해서 인덱스를 사용
+    """
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
@@ -1,4 +1,9 @@
-from typing import List
+import base64
+import json
+from datetime import date, datetime
+from typing import List, Sequence
+
+from sqlalchemy import and_, or_
 
 
 def to_dict(model, *args, exclude: List = None):
@@ -9,3 +14,49 @@ def to_dict(model, *args, exclude: List = None):
                 q_dict[c.name] = getattr(model, c.name)
 
     return q_dict
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence) -> str:
+    """
+    keyset 페이징 cursor (마지막 행의 정렬 컬럼 값을 JSON -> urlsafe base64)
+    """
+    values = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    """
+    encode_cursor 의 반대 - 컬럼 타입에 맞게 값을 되돌림
+    :raise InvalidCursor: 형식이 다르거나 컬럼 수가 맞지 않는 cursor
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise InvalidCursor(cursor)
+        decoded = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise InvalidCursor(cursor)
+            decoded.append(value)
+        return decoded
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def keyset_after(columns: Sequence, values: Sequence):
+    """
+    내림차순 (c1, c2, ...) 정렬에서 values 다음 행들의 조건
+    c1 < v1 OR (c1 = v1 AND c2 < v2) OR ... - 행 값 비교 (c1, c2) < (v1, v2) 와 같지만 MySQL 에서도 인덱스 범위 검색이 됨
+    """
+    conditions = []
+    for n, (column, value) in enumerate(zip(columns, values)):
+        equal = [col == val for col, val in zip(columns[:n], values[:n])]
+        conditions.append(and_(*equal, column < value))
+    return or_(*conditions)
@@ -0,0 +1,8 @@
+"""
+얼굴 인식(face-ai) 파이프라인 오프라인 벤치마크
+카메라나 네트워크 없이 known_faces.dat 인코딩으로 만든 합성 갤러리와 benchmarks/images 의 이미지로
+디코딩, 검출, 인코딩, 매칭 단계를 따로 측정하고 결과를 JSON 으로 출력한다.
+
+    python -m benchmarks                          # 전체 suite (suite 마다 별도 프로세스, peak RSS 분리)
+    python -m benchmarks --suite match --sizes 1000 100000 --output result.json
+"""
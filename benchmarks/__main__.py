@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.data import BASE_DIR, KNOWN_FACES_PATH
+from benchmarks.harness import peak_rss_mb
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    from benchmarks.suites import SUITES
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="face-ai offline benchmarks")
+    parser.add_argument("--suite", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000], help="synthetic gallery sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="measured calls per case")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF nprobe for the match suite")
+    parser.add_argument("--pool-size", type=int, default=2, help="FacePool workers for the pipeline suite")
+    parser.add_argument("--gallery", default=KNOWN_FACES_PATH,
+                        help="known faces pickle the pipeline suite matches benchmarks/images/<name>/ against")
+    parser.add_argument("--output", default="-", help="JSON output path (- for stdout)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="run suites in this process (peak RSS is then shared by all suites)")
+    return parser.parse_args(argv)
+
+
+def run_in_process(options) -> dict:
+    from benchmarks.suites import SUITES
+
+    results = {}
+    for name in options.suite:
+        results[name] = SUITES[name](options)
+        results[name]["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def run_isolated(options) -> dict:
+    """
+    suite 마다 새 프로세스에서 실행 (peak RSS 가 다른 suite 의 영향을 받지 않도록)
+    """
+    results = {}
+    passthrough = [
+        "--sizes", *map(str, options.sizes), "--repeat", str(options.repeat), "--nprobe", str(options.nprobe),
+        "--pool-size", str(options.pool_size), "--gallery", options.gallery,
+    ]
+    for name in options.suite:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks", "--in-process", "--output", "-", "--suite", name, *passthrough],
+            cwd=BASE_DIR, capture_output=True, text=True,
+        )
+        if output.returncode != 0:
+            lines = output.stderr.strip().splitlines()
+            results[name] = {"error": lines[-1] if lines else f"exit code {output.returncode}"}
+            continue
+        results[name] = json.loads(output.stdout)["suites"][name]
+    return results
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    suites = run_in_process(options) if options.in_process else run_isolated(options)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "sizes": options.sizes,
+            "repeat": options.repeat,
+        },
+        "suites": suites,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if options.output == "-":
+        print(text)
+    else:
+        with open(options.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+예약 등록 동시성 스트레스 테스트 (실행 중인 서버 대상)
+한 수강에 여러 날짜의 예약을 동시에 보내고, 남은 수강 횟수를 넘기거나 같은 날 두 건 이상 들어간 예약이 없는지 확인한다.
+테스트 DB 의 수강에 실행할 것 (실제로 예약이 만들어짐).
+
+    python -m benchmarks.booking_stress --url http://localhost:8000 --token <JWT> --course-id 1 \\
+        --requests 300 --workers 100 --days 10 --start 2030-01-01
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dtime, timedelta
+
+import requests
+
+from benchmarks.harness import summarize
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.booking_stress", description="booking concurrency stress test")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="JWT (Authorization: Bearer)")
+    parser.add_argument("--course-id", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=300, help="total register calls")
+    parser.add_argument("--workers", type=int, default=100, help="parallel clients")
+    parser.add_argument("--days", type=int, default=10, help="distinct reservation dates (calls are spread over them)")
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today() + timedelta(days=365))
+    return parser.parse_args(argv)
+
+
+def remaining_sessions(http: requests.Session, url: str, course_id: int):
+    response = http.get(f"{url}/course/remain/session-count/list", params={"id": course_id}).json()["response"]
+    courses = response["result"] if isinstance(response, dict) else []
+    # 남은 횟수가 0 이면 목록에 나오지 않음
+    return courses[0]["remaining_sessions"] if courses else 0
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    http = requests.Session()
+    http.headers["Authorization"] = f"Bearer {options.token}"
+    remaining_before = remaining_sessions(http, options.url, options.course_id)
+    days = [datetime.combine(options.start + timedelta(days=n), dtime(10, 0)) for n in range(options.days)]
+
+    def register(n: int):
+        start = time.perf_counter()
+        body = http.post(f"{options.url}/class-booking/register", json={
+            "course_id": options.course_id,
+            "reservation_date": days[n % len(days)].isoformat(),
+            "enrollment_status": "1",
+        }).json()
+        status = body["response"].get("status_code", 201) if isinstance(body["response"], dict) else 201
+        return time.perf_counter() - start, body["result"], status, body["result_msg"]
+
+    with ThreadPoolExecutor(max_workers=options.workers) as executor:
+        results = list(executor.map(register, range(options.requests)))
+
+    # 결과 확인: 날짜별 유효한 예약 수, 차감된 수강 횟수
+    bookings = http.get(f"{options.url}/class-booking/export", params={
+        "start_date": days[0].date().isoformat(), "end_date": days[-1].date().isoformat(),
+    }).text.splitlines()
+    per_day = Counter(
+        row["reservation_date"][:10] for row in map(json.loads, bookings)
+        if row["course_id"] == options.course_id and row["enrollment_status"] != "3"
+    )
+    succeeded = sum(1 for _, result, _, _ in results if result == "success")
+    remaining_after = remaining_sessions(http, options.url, options.course_id)
+    violations = [f"{day}: {count} bookings" for day, count in per_day.items() if count > 1]
+    if succeeded > min(remaining_before, options.days):
+        violations.append(f"{succeeded} bookings succeeded with {remaining_before} sessions left over {options.days} days")
+    if remaining_after != remaining_before - succeeded:
+        violations.append(f"remaining_sessions {remaining_before} -> {remaining_after} after {succeeded} bookings")
+
+    report = {
+        "requests": options.requests,
+        "workers": options.workers,
+        "remaining_before": remaining_before,
+        "remaining_after": remaining_after,
+        "succeeded": succeeded,
+        "outcomes": {f"{status} {message}": count for (status, message), count in
+                     Counter((status, message) for _, _, status, message in results).items()},
+        "latency": summarize([latency for latency, _, _, _ in results]),
+        "violations": violations,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
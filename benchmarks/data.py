@@ -0,0 +1,97 @@
+import os
+import pickle
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.face.gallery import ENCODING_DIM
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KNOWN_FACES_PATH = os.path.join(BASE_DIR, "known_faces.dat")
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# 합성 인물 생성용 표준편차 (dlib 인코딩 기준 인물 간 거리 약 0.8~1.1, 같은 인물 사진 간 거리 약 0.3)
+IDENTITY_SIGMA = 0.07
+SAMPLE_SIGMA = 0.025
+
+
+def load_known_faces(path: str = KNOWN_FACES_PATH) -> Tuple[np.ndarray, List[str]]:
+    with open(path, "rb") as f:
+        encodings, names = pickle.load(f)
+    return np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM), list(names)
+
+
+def synthetic_gallery(size: int, photos_per_person: int = 5, seed: int = 0):
+    """
+    known_faces.dat 인코딩을 기준으로 합성 갤러리 생성
+    실제 인코딩 하나를 골라 인물 중심을 만들고, 인물마다 photos_per_person 장의 사진 인코딩을 만든다.
+    :return: encodings (size, 128) float32, names, 인물 중심 (질의 생성용)
+    """
+    rng = np.random.default_rng(seed)
+    known, _ = load_known_faces()
+    people = -(-size // photos_per_person)
+    centers = known[rng.integers(0, len(known), people)] + rng.normal(0, IDENTITY_SIGMA, (people, ENCODING_DIM))
+    owner = np.repeat(np.arange(people), photos_per_person)[:size]
+    encodings = centers[owner] + rng.normal(0, SAMPLE_SIGMA, (size, ENCODING_DIM))
+    names = [f"person_{n}" for n in owner]
+    return encodings.astype(np.float32), names, centers.astype(np.float32)
+
+
+def synthetic_queries(centers: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    """
+    갤러리 인물의 새 사진에 해당하는 질의 인코딩
+    """
+    rng = np.random.default_rng(seed)
+    picked = centers[rng.integers(0, len(centers), count)]
+    return (picked + rng.normal(0, SAMPLE_SIGMA, picked.shape)).astype(np.float32)
+
+
+def synthetic_images(count: int = 8, seed: int = 0) -> List[Tuple[str, bytes]]:
+    """
+    images 폴더가 비어 있을 때 쓰는 합성 JPEG (얼굴이 없으므로 해상도별 디코딩 비용 측정에만 사용)
+    """
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    sizes = [(640, 480), (1280, 720), (1920, 1080), (4000, 3000)]
+    images = []
+    for n in range(count):
+        width, height = sizes[n % len(sizes)]
+        # 노이즈만 있으면 JPEG 크기가 비현실적으로 커지므로 부드러운 그라디언트 + 약한 노이즈
+        small = rng.integers(0, 255, (height // 32 + 1, width // 32 + 1, 3), dtype=np.uint8)
+        frame = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+        frame = cv2.add(frame, rng.integers(0, 16, frame.shape, dtype=np.uint8))
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        images.append((f"synthetic_{width}x{height}_{n}.jpg", buf.tobytes()))
+    return images
+
+
+def load_images(path: str = IMAGES_DIR) -> Tuple[List[Tuple[str, bytes]], bool]:
+    """
+    벤치마크 이미지 (benchmarks/images 아래 파일, 없으면 합성 이미지)
+    하위 폴더의 이미지는 폴더 이름이 사진 속 인물의 갤러리 이름 (images/<이름>/<파일>, 매칭률 계산용)
+    :return: [(images 기준 상대 경로, 바이트)], 합성 이미지 여부
+    """
+    files = []
+    if os.path.isdir(path):
+        for root, _, names in os.walk(path):
+            files.extend(
+                os.path.relpath(os.path.join(root, name), path)
+                for name in names if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+    if not files:
+        return synthetic_images(), True
+    images = []
+    for name in sorted(files):
+        with open(os.path.join(path, name), "rb") as f:
+            images.append((name, f.read()))
+    return images, False
+
+
+def image_label(name: str) -> Optional[str]:
+    """
+    load_images 의 상대 경로에서 인물 이름 (images 바로 아래 파일이면 None)
+    """
+    label = os.path.dirname(name)
+    return label.split(os.sep)[0] if label else None
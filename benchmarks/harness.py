@@ -0,0 +1,59 @@
+import sys
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def summarize(latencies: list, items_per_call: int = 1) -> dict:
+    """
+    호출별 소요 시간(초) 목록을 처리량과 지연 시간 분위수로 요약
+    :param items_per_call: 호출 한 번이 처리한 항목 수 (이미지, 질의 등)
+    """
+    latencies = np.asarray(latencies, dtype=np.float64)
+    total = float(latencies.sum())
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "calls": int(len(latencies)),
+        "items_per_call": items_per_call,
+        "throughput": len(latencies) * items_per_call / total if total else 0.0,
+        "mean_ms": float(latencies.mean() * 1000) if len(latencies) else 0.0,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+
+def measure(fn: Callable, args_list: list = None, repeat: int = 20, warmup: int = 2, items_per_call: int = 1) -> dict:
+    """
+    fn 실행 시간 측정
+    :param args_list: 호출마다 넘길 인자 튜플 목록 (순서대로 돌아가며 사용, 없으면 인자 없이 호출)
+    :param repeat: 측정 호출 수
+    :param warmup: 측정 전 버리는 호출 수
+    """
+    args_list = args_list or [()]
+    for n in range(warmup):
+        fn(*args_list[n % len(args_list)])
+    latencies = []
+    for n in range(repeat):
+        args = args_list[n % len(args_list)]
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, items_per_call)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    현재 프로세스의 최대 RSS (MB)
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 는 KB, macOS 는 byte 단위
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
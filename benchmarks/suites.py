@@ -0,0 +1,303 @@
+import asyncio
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+from fastapi import FastAPI
+
+from app.common.consts import FACE_DETECTION_PROFILES, FACE_MATCH_TOLERANCE
+from app.face import worker
+from app.face.ann import IVFIndex
+from app.face.compact import CompactGallery
+from app.face.gallery import FaceGallery
+from app.face.pool import FacePool
+from benchmarks.data import (
+    BASE_DIR, image_label, load_images, load_known_faces, synthetic_gallery, synthetic_queries,
+)
+from benchmarks.harness import measure, summarize
+
+BATCH_QUERIES = 32
+NO_FACE_IMAGES = "benchmarks/images has no images (synthetic images contain no faces)"
+
+
+def face_recognition_available() -> bool:
+    return importlib.util.find_spec("face_recognition") is not None
+
+
+def skipped(reason: str) -> dict:
+    return {"skipped": reason}
+
+
+def suite_decode(options) -> dict:
+    """
+    프로파일별 이미지 디코딩(축소 디코딩 + 리사이즈) 단계
+    """
+    images, synthetic = load_images()
+    args = [(data,) for _, data in images]
+    results = {"images": len(images), "synthetic_images": synthetic, "profiles": {}}
+    for name, profile in FACE_DETECTION_PROFILES.items():
+        results["profiles"][name] = measure(
+            lambda data: worker.decode_image(data, profile["reduce"], profile["max_width"]),
+            args, repeat=options.repeat * len(args),
+        )
+    return results
+
+
+def suite_detect(options) -> dict:
+    """
+    프로파일별 얼굴 위치 검출 단계 (디코딩 결과를 미리 만들어 두고 검출만 측정)
+    """
+    if not face_recognition_available():
+        return skipped("face_recognition is not installed")
+    images, synthetic = load_images()
+    if synthetic:
+        return skipped(NO_FACE_IMAGES)
+    worker.init_worker()
+    results = {"images": len(images), "profiles": {}}
+    for name, profile in FACE_DETECTION_PROFILES.items():
+        frames = [(worker.decode_image(data, profile["reduce"], profile["max_width"])[0],) for _, data in images]
+        results["profiles"][name] = measure(
+            lambda frame: worker._face_recognition.face_locations(
+                frame, number_of_times_to_upsample=profile["upsample"], model=profile["model"]
+            ),
+            frames, repeat=options.repeat, warmup=1,
+        )
+    return results
+
+
+def suite_encode(options) -> dict:
+    """
+    얼굴 인코딩 단계 (balanced 프로파일로 검출된 얼굴)
+    """
+    if not face_recognition_available():
+        return skipped("face_recognition is not installed")
+    images, synthetic = load_images()
+    if synthetic:
+        return skipped(NO_FACE_IMAGES)
+    worker.init_worker()
+    profile = FACE_DETECTION_PROFILES["balanced"]
+    args = []
+    for _, data in images:
+        frame, _ = worker.decode_image(data, profile["reduce"], profile["max_width"])
+        locations = worker._face_recognition.face_locations(frame, number_of_times_to_upsample=profile["upsample"])
+        if locations:
+            args.append((frame, locations))
+    if not args:
+        return skipped("no faces detected in benchmarks/images")
+    faces = sum(len(locations) for _, locations in args)
+    result = measure(
+        lambda frame, locations: worker._face_recognition.face_encodings(frame, locations),
+        args, repeat=options.repeat, warmup=1,
+    )
+    return {"images": len(args), "faces": faces, "encode": result}
+
+
+def suite_pipeline(options) -> dict:
+    """
+    프로파일별 디코딩 -> 검출 -> 인코딩 전체
+    accuracy: 검출된 얼굴 수와 known_faces.dat(--gallery) 기준 인식률
+    in_process: 이 프로세스에서 한 장씩 (워커 함수 자체 비용)
+    pool_single: 이미지마다 풀에 따로 제출 (/recognize_face/ 를 이미지 수만큼 동시에 호출하는 경우)
+    pool_batch: map_chunks 로 워커 수만큼 묶어서 제출 (/recognize_batch/ 한 번)
+    """
+    if not face_recognition_available():
+        return skipped("face_recognition is not installed")
+    images, synthetic = load_images()
+    if synthetic:
+        return skipped(NO_FACE_IMAGES)
+    worker.init_worker()
+    batch = [data for _, data in images]
+    known, known_names = load_known_faces(options.gallery)
+    gallery = FaceGallery(known, known_names)
+    results = {"images": len(images), "pool_size": options.pool_size, "profiles": {}}
+
+    pool = FacePool(FastAPI(), FACE_POOL_SIZE=options.pool_size)
+    pool.start()
+    loop = asyncio.new_event_loop()
+
+    async def submit_each(profile):
+        return await asyncio.gather(*(pool.run(worker.detect_and_encode, data, profile) for data in batch))
+
+    try:
+        for name, profile in FACE_DETECTION_PROFILES.items():
+            try:
+                accuracy = profile_accuracy(images, profile, gallery)
+            except Exception as e:
+                # 예: accurate(cnn) 프로파일의 큰 이미지 메모리 부족
+                results["profiles"][name] = {"error": f"{type(e).__name__}: {e}"}
+                continue
+            results["profiles"][name] = {
+                "accuracy": accuracy,
+                "in_process": measure(
+                    lambda data: worker.detect_and_encode(data, profile),
+                    [(data,) for data in batch], repeat=options.repeat, warmup=1,
+                ),
+                "pool_single": measure(
+                    lambda: loop.run_until_complete(submit_each(profile)),
+                    repeat=max(1, options.repeat // len(batch)), warmup=1, items_per_call=len(batch),
+                ),
+                "pool_batch": measure(
+                    lambda: loop.run_until_complete(pool.map_chunks(worker.detect_and_encode_batch, batch, profile)),
+                    repeat=max(1, options.repeat // len(batch)), warmup=1, items_per_call=len(batch),
+                ),
+            }
+    finally:
+        pool.shutdown()
+        loop.close()
+    return results
+
+
+def profile_accuracy(images: list, profile: dict, gallery: FaceGallery) -> dict:
+    """
+    프로파일의 검출/인식 결과 (지연 시간과 함께 프로파일 기본값을 고르는 근거)
+    faces_found: 검출된 얼굴 수, images_with_faces: 얼굴이 하나 이상 검출된 이미지 비율
+    match_rate: 인물 폴더(images/<이름>/) 사진 중 그 이름으로 인식된(FACE_MATCH_TOLERANCE 이내) 얼굴이 있는 비율
+    """
+    faces_found = images_with_faces = labeled = matched = 0
+    for path, data in images:
+        result = worker.detect_and_encode(data, profile)
+        faces_found += len(result["encodings"])
+        images_with_faces += bool(len(result["encodings"]))
+        label = image_label(path)
+        if label is None:
+            continue
+        labeled += 1
+        if len(result["encodings"]):
+            indices, distances = gallery.search_batch(result["encodings"], 1, exact=True)
+            matched += any(
+                len(face_indices) and face_distances[0] <= FACE_MATCH_TOLERANCE
+                and gallery.names[face_indices[0]] == label
+                for face_indices, face_distances in zip(indices, distances)
+            )
+    return {
+        "faces_found": faces_found,
+        "images_with_faces": images_with_faces / len(images),
+        "labeled_images": labeled,
+        "match_rate": matched / labeled if labeled else None,
+    }
+
+
+def recall_at_1(indices: np.ndarray, exact: np.ndarray) -> float:
+    return float((indices[:, 0] == exact[:, 0]).mean())
+
+
+def suite_match(options) -> dict:
+    """
+    갤러리 크기별 매칭 단계
+    정확 검색(질의 1개 / 32개 묶음), IVF ANN, prototype/양자화 스캔의 지연 시간과 정확 검색 대비 recall@1, 스캔 행렬 크기
+    """
+    known, known_names = load_known_faces()
+    results = {"known_faces": validate_known_faces(known, known_names, options.nprobe), "sizes": {}}
+    for size in options.sizes:
+        encodings, names, centers = synthetic_gallery(size)
+        queries = synthetic_queries(centers, max(BATCH_QUERIES, options.repeat))
+        single = [(query,) for query in queries]
+        batch = [(queries[n:n + BATCH_QUERIES],) for n in range(0, len(queries) - BATCH_QUERIES + 1, BATCH_QUERIES)]
+
+        gallery = FaceGallery(encodings, names)
+        exact_idx, _ = gallery.search_batch(queries, 1, exact=True)
+        size_result = {
+            "gallery_bytes": int(gallery.encodings.nbytes),
+            "exact": {
+                "single": measure(lambda q: gallery.search_batch(q, 1, exact=True), single, repeat=options.repeat),
+                "batch": measure(lambda q: gallery.search_batch(q, 1, exact=True), batch,
+                                 repeat=options.repeat, items_per_call=BATCH_QUERIES),
+            },
+        }
+
+        ann_gallery = FaceGallery(encodings, names)
+        start = time.perf_counter()
+        ann_gallery.enable_ann(IVFIndex(nprobe=options.nprobe, min_train_size=0))
+        train_seconds = time.perf_counter() - start
+        ann_idx, _ = ann_gallery.search_batch(queries, 1)
+        size_result["ann"] = {
+            "train_seconds": train_seconds,
+            "recall_at_1": recall_at_1(ann_idx, exact_idx),
+            "single": measure(lambda q: ann_gallery.search_batch(q, 1), single, repeat=options.repeat),
+        }
+
+        for mode, dtype in (("full", "float16"), ("full", "int8"), ("prototype", "float32"), ("prototype", "int8")):
+            compact = CompactGallery(FaceGallery(encodings, names), mode=mode, dtype=dtype)
+            compact_idx, _ = compact.search_batch(queries, 1)
+            size_result[f"{mode}_{dtype}"] = {
+                "scan_bytes": int(compact.nbytes),
+                "recall_at_1": recall_at_1(compact_idx, exact_idx),
+                "single": measure(lambda q: compact.search_batch(q, 1), single, repeat=options.repeat),
+                "batch": measure(lambda q: compact.search_batch(q, 1), batch,
+                                 repeat=options.repeat, items_per_call=BATCH_QUERIES),
+            }
+        results["sizes"][str(size)] = size_result
+    return results
+
+
+def validate_known_faces(known: np.ndarray, names: list, nprobe: int = 8) -> dict:
+    """
+    known_faces.dat 자체로 정확 검색과 다른 검색 방식의 결과 비교 (각 인코딩을 약간 흔든 질의)
+    같은 결과여야 하는지는 tests/test_face_gallery.py 에서 확인하고 여기서는 --nprobe 별 수치만 남긴다.
+    (known_faces.dat 는 FACE_ANN_MIN_SIZE 보다 작아서 min_train_size=0)
+    """
+    rng = np.random.default_rng(0)
+    queries = known + rng.normal(0, 0.02, known.shape).astype(np.float32)
+    exact_idx, _ = FaceGallery(known, names).search_batch(queries, 1, exact=True)
+    exact_names = np.asarray(names)[exact_idx[:, 0]]
+    result = {"encodings": int(len(known)), "names": len(set(names))}
+    for mode, dtype in (("full", "int8"), ("prototype", "float16"), ("prototype", "int8")):
+        compact_idx, _ = CompactGallery(FaceGallery(known, names), mode=mode, dtype=dtype).search_batch(queries, 1)
+        result[f"{mode}_{dtype}_same_name"] = float((np.asarray(names)[compact_idx[:, 0]] == exact_names).mean())
+
+    ann_gallery = FaceGallery(known, names)
+    ann_gallery.enable_ann(IVFIndex(nprobe=nprobe, min_train_size=0))
+    ann_idx, _ = ann_gallery.search_batch(queries, 1)
+    ann_names = np.asarray(names)[ann_idx[:, 0]]
+    result["ivf_same_name"] = float((ann_names == exact_names).mean())
+    result["ivf_mismatches"] = [
+        {"query": int(n), "exact": str(exact_names[n]), "ivf": str(ann_names[n])}
+        for n in np.flatnonzero(ann_names != exact_names)
+    ]
+    return result
+
+
+STARTUP_SCRIPT = """
+import resource, sys, time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "numpy" in sys.modules)
+"""
+
+
+def suite_startup(options) -> dict:
+    """
+    앱 import(기동) 시간과 메모리: FACE_AI_ENABLED true / false 비교 (매번 새 프로세스)
+    """
+    results = {}
+    app_dir = os.path.join(BASE_DIR, "app")
+    for enabled in ("true", "false"):
+        env = dict(os.environ, FACE_AI_ENABLED=enabled, PYTHONPATH=os.pathsep.join([app_dir, BASE_DIR]))
+        latencies, rss, numpy_loaded = [], [], False
+        for _ in range(max(1, options.repeat // 4)):
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_SCRIPT], cwd=app_dir, env=env,
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            latencies.append(float(output[0]))
+            rss.append(float(output[1]))
+            numpy_loaded = output[2] == "True"
+        results[f"face_ai_{enabled}"] = {
+            **summarize(latencies),
+            "peak_rss_mb": max(rss),
+            "numpy_loaded": numpy_loaded,
+        }
+    return results
+
+
+SUITES = {
+    "decode": suite_decode,
+    "detect": suite_detect,
+    "encode": suite_encode,
+    "pipeline": suite_pipeline,
+    "match": suite_match,
+    "startup": suite_startup,
+}
@@ -0,0 +1,13 @@
+-- course.remaining_sessions: 남은 수강 횟수 (session_count - 수강준비/수강완료 예약 수)
+ALTER TABLE course ADD COLUMN remaining_sessions INT NOT NULL DEFAULT 0 AFTER payment_date;
+
+UPDATE course
+SET remaining_sessions = session_count - (
+    SELECT COUNT(*) FROM class_booking
+    WHERE class_booking.course_id = course.id
+      AND class_booking.enrollment_status IN ('1', '2')
+      AND class_booking.deleted_at IS NULL
+);
+
+-- /course/remain/session-count/list: deleted_at IS NULL AND remaining_sessions > 0 범위 검색
+CREATE INDEX ix_course_deleted_at_remaining_sessions ON course (deleted_at, remaining_sessions);
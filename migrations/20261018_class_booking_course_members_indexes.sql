@@ -0,0 +1,13 @@
+-- class_booking: 수강별 예약 (중복 예약 확인, 수강 목록의 예약 정보, 체크인의 오늘 예약)
+CREATE INDEX ix_class_booking_course_id_deleted_at_reservation_date
+    ON class_booking (course_id, deleted_at, reservation_date);
+-- class_booking: 예약 목록 (예약일 범위, 예약일/id cursor 정렬)
+CREATE INDEX ix_class_booking_deleted_at_reservation_date
+    ON class_booking (deleted_at, reservation_date);
+
+-- course: 회원별 수강 (회원 목록의 수강 정보, 얼굴 체크인의 오늘 유효한 수강)
+CREATE INDEX ix_course_members_id_deleted_at_end_date
+    ON course (members_id, deleted_at, end_date);
+
+-- members: 목록 조회 (deleted_at IS NULL)
+CREATE INDEX ix_members_deleted_at ON members (deleted_at);
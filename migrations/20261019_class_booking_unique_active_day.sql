@@ -0,0 +1,10 @@
+-- class_booking.active_day: 유효한 예약(삭제/취소 제외)의 예약일, 나머지는 NULL
+-- 같은 수강의 같은 날 유효한 예약이 이미 여러 건이면 unique 키 생성이 실패하므로 먼저 확인:
+--   SELECT course_id, DATE(reservation_date), COUNT(*) FROM class_booking
+--   WHERE deleted_at IS NULL AND enrollment_status <> '3'
+--   GROUP BY course_id, DATE(reservation_date) HAVING COUNT(*) > 1;
+ALTER TABLE class_booking
+    ADD COLUMN active_day DATE AS (
+        CASE WHEN deleted_at IS NULL AND enrollment_status <> '3' THEN DATE(reservation_date) END
+    ) STORED,
+    ADD UNIQUE KEY uq_class_booking_course_id_active_day (course_id, active_day);
@@ -0,0 +1,88 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+
+# app.main 은 app/ 아래 모듈(routers, internal ...)을 바로 import 하므로 두 경로 모두 추가
+sys.path[:0] = [ROOT, os.path.join(ROOT, "app")]
+
+# MySQL 대신 SQLite 파일 DB 로 라우터를 띄움 (config 는 import 시점에 환경 변수를 읽음)
+os.environ.setdefault("DB_PORT", "3306")
+os.environ["DB_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["FACE_AI_ENABLED"] = "false"
+os.environ["DB_COUNT_STRATEGY"] = "exact"
+
+from sqlalchemy import event  # noqa: E402
+
+from app.database import conn  # noqa: E402
+
+# 비동기 엔진도 같은 SQLite 파일을 aiosqlite 로 염
+conn.ASYNC_DRIVERS["sqlite"] = "sqlite+aiosqlite"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database.conn import Base, db  # noqa: E402
+from app.database.count import count_cache  # noqa: E402
+from app.database.schema import Course, Members  # noqa: E402
+from main import app, verify_token  # noqa: E402
+
+NOW = datetime(2030, 3, 4, 16, 30)
+
+
+@pytest.fixture
+def client():
+    """
+    테이블을 새로 만든 DB 에 인증 없이 붙는 TestClient
+    """
+    Base.metadata.drop_all(db.engine)
+    Base.metadata.create_all(db.engine)
+    count_cache.invalidate("members", "course", "class_booking")
+    app.dependency_overrides[verify_token] = lambda: {}
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def session(client):
+    with db.session_scope() as db_session:
+        yield db_session
+
+
+@pytest.fixture
+def statements(client):
+    """
+    동기/비동기 엔진에서 실행된 SQL 목록
+    """
+    executed = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engines = (db.engine, db.async_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", collect)
+    yield executed
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", collect)
+
+
+def add_course(session, name: str = "member", session_count: int = 10, **kwargs) -> Course:
+    """
+    회원과 수강 정보를 만들어 돌려줌
+    """
+    member = Members(name=name, parent_phone="01000000000", birth_day=NOW.date())
+    session.add(member)
+    session.flush()
+    course = Course(
+        members_id=member.id, class_type="1", start_date=NOW, end_date=NOW, session_count=session_count,
+        remaining_sessions=session_count, payment_amount=1, payment_date=NOW, **kwargs
+    )
+    session.add(course)
+    session.flush()
+    return course
@@ -0,0 +1,32 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.database.schema import ClassBooking, Course, Members
+from app.face.attendance import AttendanceBuffer
+
+
+def test_checkin_after_course_registered_same_day(client, session):
+    now = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    member = Members(name="member", parent_phone="01000000000", birth_day=now.date())
+    session.add(member)
+    session.commit()
+    buffer = AttendanceBuffer()
+
+    # 수강 정보가 없을 때의 체크인은 기록되지 않지만 같은 날 다시 체크인할 수 있어야 함
+    assert buffer.add(member.id, now)
+    asyncio.run(buffer.flush())
+    assert buffer.results == {"no_course": 1}
+
+    session.add(Course(
+        members_id=member.id, class_type="1", start_date=now - timedelta(days=1), end_date=now + timedelta(days=30),
+        session_count=10, remaining_sessions=10, payment_amount=1, payment_date=now
+    ))
+    session.commit()
+
+    assert buffer.add(member.id, now + timedelta(minutes=5))
+    asyncio.run(buffer.flush())
+    assert buffer.results == {"no_course": 1, "checked_in": 1}
+    assert session.query(ClassBooking).filter(ClassBooking.enrollment_status == "2").count() == 1
+
+    # 기록된 뒤에는 같은 날 다시 체크인해도 무시
+    assert not buffer.add(member.id, now + timedelta(minutes=10))
@@ -0,0 +1,167 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+
+from app.database.schema import ClassBooking, Course
+from conftest import NOW, add_course
+from main import app
+
+
+def register(client, course_id: int, reservation_date, enrollment_status: str = "1") -> dict:
+    return client.post("/class-booking/register", json={
+        "course_id": course_id, "reservation_date": str(reservation_date), "enrollment_status": enrollment_status
+    }).json()
+
+
+def schedule(client, course_id: int, **kwargs) -> dict:
+    return client.post("/class-booking/schedule", json={
+        "course_id": course_id, "weekdays": [0, 2], "time": "16:30:00",
+        "start_date": "2030-03-01", "end_date": "2030-03-31", **kwargs
+    }).json()
+
+
+def register_concurrently(course_id: int, reservation_dates: list) -> list:
+    """
+    예약 입력을 한 이벤트 루프에서 동시에 보냄 (각 요청이 비동기 풀의 다른 커넥션을 씀)
+    """
+    async def send():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            responses = await asyncio.gather(*(async_client.post("/class-booking/register", json={
+                "course_id": course_id, "reservation_date": str(reservation_date), "enrollment_status": "1"
+            }) for reservation_date in reservation_dates))
+        return [response.json() for response in responses]
+
+    return asyncio.run(send())
+
+
+def remaining_sessions(session, course_id: int) -> int:
+    session.expire_all()
+    return session.get(Course, course_id).remaining_sessions
+
+
+def booking_count(session, course_id: int) -> int:
+    return session.query(ClassBooking).filter(ClassBooking.course_id == course_id).count()
+
+
+def test_register_duplicate_day(client, session):
+    course_id = add_course(session).id
+    session.commit()
+
+    assert register(client, course_id, NOW)["result"] == "success"
+    # 같은 날 다른 시간도 중복
+    response = register(client, course_id, NOW + timedelta(hours=2))
+
+    assert response == {"result": "fail", "result_msg": "중복 된 수강 날짜", "response": {"status_code": 409}}
+    # 실패한 예약의 차감은 되돌려짐
+    assert remaining_sessions(session, course_id) == 9
+    assert booking_count(session, course_id) == 1
+
+
+def test_register_duplicate_day_after_cancel(client, session):
+    course_id = add_course(session).id
+    session.commit()
+
+    # 취소(3) 된 예약은 같은 날 다시 예약할 수 있음
+    assert register(client, course_id, NOW, enrollment_status="3")["result"] == "success"
+    assert register(client, course_id, NOW)["result"] == "success"
+    assert booking_count(session, course_id) == 2
+
+
+def test_register_session_limit(client, session):
+    course_id = add_course(session, session_count=2).id
+    session.commit()
+
+    assert register(client, course_id, NOW)["result"] == "success"
+    assert register(client, course_id, NOW + timedelta(days=1))["result"] == "success"
+    response = register(client, course_id, NOW + timedelta(days=2))
+
+    assert response["result"] == "fail"
+    assert response["response"] == {"status_code": 409}
+    assert remaining_sessions(session, course_id) == 0
+    assert booking_count(session, course_id) == 2
+
+
+def test_register_unknown_course(client):
+    assert register(client, 999, NOW)["response"] == {"status_code": 404}
+
+
+def test_schedule_duplicate_day(client, session):
+    course_id = add_course(session).id
+    session.commit()
+
+    assert register(client, course_id, NOW)["result"] == "success"
+    # 3월 월/수 중 3/4(월) 가 이미 예약됨
+    response = schedule(client, course_id, end_date="2030-03-10")
+
+    assert response["result"] == "fail"
+    assert response["response"] == {"status_code": 409}
+    assert "2030-03-04" in response["result_msg"]
+    assert remaining_sessions(session, course_id) == 9
+    assert booking_count(session, course_id) == 1
+
+
+def test_schedule_session_limit(client, session):
+    course_id = add_course(session, session_count=5).id
+    session.commit()
+
+    # 3월 월/수는 9회 - 남은 5회를 넘으므로 하나도 만들지 않음
+    response = schedule(client, course_id)
+
+    assert response["result"] == "fail"
+    assert response["response"] == {"status_code": 409}
+    assert remaining_sessions(session, course_id) == 5
+    assert booking_count(session, course_id) == 0
+
+    response = schedule(client, course_id, end_date="2030-03-15")
+    assert response["result"] == "success"
+    assert remaining_sessions(session, course_id) == 1
+    assert booking_count(session, course_id) == 4
+
+
+def test_patch_reactivate_without_sessions(client, session):
+    course = add_course(session, session_count=1)
+    session.add(ClassBooking(course_id=course.id, reservation_date=NOW, enrollment_status="1"))
+    session.add(ClassBooking(course_id=course.id, reservation_date=NOW + timedelta(days=1), enrollment_status="3"))
+    course.remaining_sessions = 0
+    session.commit()
+    cancelled_id = session.query(ClassBooking.id).filter(ClassBooking.enrollment_status == "3").scalar()
+
+    # 남은 횟수가 없어 거절된 수정은 예약일도 바꾸지 않음
+    response = client.patch(f"/class-booking/{cancelled_id}", json={
+        "reservation_date": str(NOW + timedelta(days=5)), "enrollment_status": "1"
+    }).json()
+
+    assert response["result"] == "fail"
+    assert response["response"] == {"status_code": 409}
+    session.expire_all()
+    booking = session.get(ClassBooking, cancelled_id)
+    assert (booking.reservation_date, booking.enrollment_status) == (NOW + timedelta(days=1), "3")
+    assert remaining_sessions(session, course.id) == 0
+
+
+def test_register_concurrent_session_limit(client, session):
+    course_id = add_course(session, session_count=3).id
+    session.commit()
+
+    # 남은 3회에 서로 다른 날 10건이 동시에 들어오면 3건만 성공
+    responses = register_concurrently(course_id, [NOW + timedelta(days=day) for day in range(10)])
+
+    assert [response["result"] for response in responses].count("success") == 3
+    assert [response["response"] for response in responses if response["result"] == "fail"] == [{"status_code": 409}] * 7
+    assert remaining_sessions(session, course_id) == 0
+    assert booking_count(session, course_id) == 3
+
+
+def test_register_concurrent_duplicate_day(client, session):
+    course_id = add_course(session).id
+    session.commit()
+
+    # 같은 날 10건이 동시에 들어오면 1건만 성공하고 나머지 차감은 되돌려짐
+    responses = register_concurrently(course_id, [NOW + timedelta(minutes=minute) for minute in range(10)])
+
+    assert [response["result"] for response in responses].count("success") == 1
+    assert [response["result_msg"] for response in responses if response["result"] == "fail"] == ["중복 된 수강 날짜"] * 9
+    assert remaining_sessions(session, course_id) == 9
+    assert booking_count(session, course_id) == 1
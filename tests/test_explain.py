@@ -0,0 +1,42 @@
+import re
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from app.database.conn import db
+from app.database.explain import hot_queries
+
+# 인덱스 없이 테이블 전체를 읽는 단계 ("SCAN t" - 인덱스를 타면 "SCAN t USING INDEX ..." / "SEARCH t ...")
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+# class_booking 목록 쿼리가 타야 하는 인덱스 (schema.py 의 __table_args__)
+EXPECTED_INDEXES = {
+    "class_booking_list_range": "ix_class_booking_deleted_at_reservation_date",
+    "class_booking_list_cursor": "ix_class_booking_deleted_at_reservation_date",
+    "class_booking_booked_days": "ix_class_booking_course_id_deleted_at_reservation_date",
+    "member_day_bookings": "ix_class_booking_course_id_deleted_at_reservation_date",
+}
+
+
+def query_plan(query) -> list:
+    """
+    SQLite EXPLAIN QUERY PLAN 의 단계 설명 목록
+    """
+    with db.engine.connect() as connection:
+        sql = str(query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+        return [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+@pytest.mark.parametrize("name, query", list(hot_queries().items()))
+def test_hot_query_compiles_for_mysql(name, query):
+    # EXPLAIN 대상은 라우터와 같은 빌더로 만든 운영(MySQL) 쿼리
+    assert str(query.compile(dialect=mysql.dialect())).lstrip().upper().startswith("SELECT")
+
+
+@pytest.mark.parametrize("name", list(hot_queries()))
+def test_hot_query_no_full_scan(client, name):
+    plan = query_plan(hot_queries()[name])
+
+    assert not [step for step in plan if FULL_SCAN.match(step)], plan
+    if name in EXPECTED_INDEXES:
+        assert any(f"INDEX {EXPECTED_INDEXES[name]} " in step for step in plan if "class_booking" in step), plan
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from app.face.ann import IVFIndex
+from app.face.compact import CompactGallery
+from app.face.gallery import FaceGallery
+from benchmarks.data import load_known_faces
+
+
+@pytest.fixture(scope="module")
+def known_faces():
+    """
+    known_faces.dat 인코딩과 각 인코딩을 약간 흔든 질의, 정확 검색 top-1 이름
+    """
+    known, names = load_known_faces()
+    names = np.asarray(names)
+    queries = known + np.random.default_rng(0).normal(0, 0.02, known.shape).astype(np.float32)
+    exact_idx, _ = FaceGallery(known, list(names)).search_batch(queries, 1, exact=True)
+    return known, names, queries, names[exact_idx[:, 0]]
+
+
+@pytest.mark.parametrize("nprobe", [1, 8])
+def test_ivf_matches_exact_search(known_faces, nprobe):
+    known, names, queries, exact_names = known_faces
+    gallery = FaceGallery(known, list(names))
+    # known_faces.dat 는 FACE_ANN_MIN_SIZE 보다 작아서 min_train_size=0 으로 강제로 학습
+    gallery.enable_ann(IVFIndex(nprobe=nprobe, min_train_size=0))
+    ivf_idx, _ = gallery.search_batch(queries, 1)
+    ivf_names = names[ivf_idx[:, 0]]
+
+    ivf_mismatches = [
+        (int(n), str(exact_names[n]), str(ivf_names[n])) for n in np.flatnonzero(ivf_names != exact_names)
+    ]
+    assert ivf_mismatches == []
+    assert (ivf_names == exact_names).mean() == 1.0
+
+
+@pytest.mark.parametrize("mode, dtype", [("full", "int8"), ("prototype", "float16"), ("prototype", "int8")])
+def test_compact_matches_exact_search(known_faces, mode, dtype):
+    known, names, queries, exact_names = known_faces
+    compact_idx, _ = CompactGallery(FaceGallery(known, list(names)), mode=mode, dtype=dtype).search_batch(queries, 1)
+
+    assert (names[compact_idx[:, 0]] == exact_names).mean() == 1.0
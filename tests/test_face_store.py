@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.face.gallery import ENCODING_DIM
+from app.face.store import FaceStore
+
+KNOWN_FACES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "known_faces.dat")
+
+
+def encodings(count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(0, 0.1, (count, ENCODING_DIM)).astype(np.float32)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """
+    같은 파일을 연 두 워커의 저장소
+    """
+    path = str(tmp_path / "known_faces")
+    return FaceStore(path).open(), FaceStore(path).open()
+
+
+def test_append_visible_to_other_worker(workers):
+    first, second = workers
+    added = encodings(3)
+    first.append(added, ["a", "a", "b"], members_id=7)
+
+    # 다른 워커는 generation 만 보고 변경을 알고, 끝에 추가된 레코드만 다시 읽음
+    assert second.generation() != second.synced_generation
+    assert second.refresh() is False
+    assert second.generation() == second.synced_generation
+    assert second.names() == ["a", "a", "b"]
+    assert np.array_equal(second.mmap(), added)
+    assert second.member_id("a") == 7
+
+
+def test_link_member_visible_to_other_worker(workers):
+    first, second = workers
+    first.append(encodings(1), ["a"])
+    second.refresh()
+
+    first.link_member("a", 3)
+    assert second.generation() != second.synced_generation
+    second.refresh()
+    assert second.member_id("a") == 3
+
+
+def test_delete_rebuilds_other_worker(workers):
+    first, second = workers
+    added = encodings(3)
+    first.append(added, ["a", "b", "a"])
+    second.refresh()
+
+    assert first.delete_name("a") == 2
+    # compaction 으로 파일이 교체되면 갤러리를 다시 구성해야 함
+    assert second.refresh() is True
+    assert second.names() == ["b"]
+    assert np.array_equal(second.mmap(), added[[1]])
+
+
+def test_delete_rebuilds_same_worker(workers):
+    first, _ = workers
+    first.append(encodings(2), ["a", "b"])
+    first.refresh()
+
+    first.delete_name("a")
+    # 직접 compaction 한 워커도 다시 구성해야 함
+    assert first.refresh() is True
+    assert first.names() == ["b"]
+    assert first.refresh() is False
+
+
+def test_open_drops_partial_record(tmp_path):
+    path = str(tmp_path / "known_faces")
+    store = FaceStore(path).open()
+    store.append(encodings(2), ["a", "b"])
+    # 사이드카 기록 전에 중단된 인코딩 레코드
+    with open(store.vec_path, "ab") as f:
+        f.write(encodings(1, seed=1).tobytes())
+
+    reopened = FaceStore(path).open()
+    assert reopened.names() == ["a", "b"]
+    assert reopened.mmap().shape == (2, ENCODING_DIM)
+
+
+def test_migrate_legacy_pickle(tmp_path):
+    store = FaceStore(str(tmp_path / "known_faces")).open(legacy_pickle_path=KNOWN_FACES_PATH)
+
+    assert store.rows == 16
+    assert set(store.names()) == {"허제호", "외국아이"}
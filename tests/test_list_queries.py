@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+
+from app.database.schema import ClassBooking
+from conftest import NOW, add_course
+
+
+@pytest.fixture
+def seeded(session):
+    for i in range(7):
+        course = add_course(session, name=f"m{i}")
+        for day in range(3):
+            session.add(ClassBooking(
+                course_id=course.id, reservation_date=NOW + timedelta(days=day), enrollment_status="1"
+            ))
+    session.commit()
+
+
+# 목록 한 번에 나가는 쿼리 수 (count + 페이지 + 관계 IN 조회) - 페이지 크기와 상관없이 일정해야 함
+@pytest.mark.parametrize("path, expected", [
+    ("/members/list", 3),
+    ("/course/list", 3),
+    ("/class-booking/list", 2),
+])
+@pytest.mark.parametrize("per_page", [1, 3, 7, 21])
+@pytest.mark.parametrize("paging", [{"use_pagination": True}, {"cursor": ""}], ids=["page", "cursor"])
+def test_list_statement_count(client, seeded, statements, path, expected, per_page, paging):
+    statements.clear()
+    response = client.get(path, params={"per_page": per_page, **paging}).json()
+
+    assert response["result"] == "success", response
+    assert len(response["response"]["result"]) == min(per_page, 21 if path == "/class-booking/list" else 7)
+    assert len(statements) == expected, statements
+
+
+def test_list_relations_loaded(client, seeded):
+    courses = client.get("/course/list").json()["response"]["result"]
+    assert sum(len(course["class_booking"]) for course in courses) == 21
+    assert courses[0]["member"]["name"] == "m6"
+
+    members = client.get("/members/list").json()["response"]["result"]
+    assert all(len(member["courses"]) == 1 for member in members)
+
+    bookings = client.get("/class-booking/list").json()["response"]["result"]
+    assert bookings[0]["member"]["name"]
+
+
+def walk_pages(client, path: str, per_page: int) -> list:
+    """
+    cursor 방식으로 마지막 페이지까지 조회한 결과 목록
+    """
+    items, cursor = [], ""
+    while cursor is not None:
+        response = client.get(path, params={"per_page": per_page, "cursor": cursor}).json()
+        assert response["result"] == "success", response
+        items += response["response"]["result"]
+        cursor = response["response"]["next_cursor"]
+    return items
+
+
+@pytest.mark.parametrize("per_page", [1, 3, 7, 100])
+def test_cursor_pages_cover_all_rows(client, seeded, per_page):
+    members = walk_pages(client, "/members/list", per_page)
+    assert [member["member"]["name"] for member in members] == [f"m{i}" for i in reversed(range(7))]
+
+    courses = walk_pages(client, "/course/list", per_page)
+    course_ids = [course["id"] for course in courses]
+    assert course_ids == sorted(set(course_ids), reverse=True) and len(course_ids) == 7
+
+    # 같은 예약일시가 여러 건이어도 (예약일시, id) 순서로 빠짐/중복 없이 이어짐
+    bookings = walk_pages(client, "/class-booking/list", per_page)
+    keys = [(booking["reservation_date"], booking["id"]) for booking in bookings]
+    assert keys == sorted(set(keys), reverse=True) and len(keys) == 21
+
+
+@pytest.mark.parametrize("path", ["/members/list", "/course/list", "/class-booking/list"])
+@pytest.mark.parametrize("cursor", ["garbage", "W10"])
+def test_invalid_cursor(client, seeded, path, cursor):
+    response = client.get(path, params={"cursor": cursor}).json()
+
+    assert response == {"result": "fail", "result_msg": "잘못된 cursor", "response": {"status_code": 400}}